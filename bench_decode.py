@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-image decode time: old path (imread in crop + imread for full OCR)
+vs new path (decode once, crop as a view of the same array).
+Usage: python bench_decode.py [image_dir] [--limit N]
+"""
+import os
+import sys
+import time
+import argparse
+
+import cv2
+
+from rename_images import SOURCE_DIR, load_image, crop_watermark_precise
+
+def decode_twice(path):
+    """Pre-change behaviour: crop_watermark_precise() decodes, then full OCR decodes again"""
+    cropped = crop_watermark_precise(path)
+    full_img = cv2.imread(path)
+    return cropped, full_img
+
+def decode_once(path):
+    """Current behaviour: one decode shared by crop and full OCR"""
+    full_img = load_image(path)
+    cropped = crop_watermark_precise(path, img=full_img)
+    return cropped, full_img
+
+def time_per_image(fn, paths, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for path in paths:
+            fn(path)
+        best = min(best, time.perf_counter() - start)
+    return best / len(paths)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('image_dir', nargs='?', default=SOURCE_DIR)
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    extensions = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff')
+    paths = sorted(
+        os.path.join(args.image_dir, f) for f in os.listdir(args.image_dir)
+        if f.lower().endswith(extensions)
+    )[:args.limit]
+    if not paths:
+        print(f"❌ No images found in '{args.image_dir}'")
+        sys.exit(1)
+
+    # Warm the OS page cache so we measure decode, not disk
+    for path in paths:
+        with open(path, 'rb') as f:
+            f.read()
+
+    before = time_per_image(decode_twice, paths, args.repeats)
+    after = time_per_image(decode_once, paths, args.repeats)
+
+    print(f"Images: {len(paths)} (best of {args.repeats})")
+    print(f"Before (decode twice): {before * 1000:8.1f} ms/image")
+    print(f"After  (decode once):  {after * 1000:8.1f} ms/image")
+    print(f"Speedup: {before / after:.2f}x")
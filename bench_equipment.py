@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Replay success_log.csv through extract_equipment_type() and the original
+regex cascade: checks the labels are identical and reports the speedup.
+Usage: python bench_equipment.py [log_csv] [--repeats N]
+"""
+import re
+import csv
+import time
+import argparse
+
+from rename_images import LOG_FILE, extract_equipment_type
+
+TARGET_SPEEDUP = 10.0
+
+def legacy_extract_equipment_type(text):
+    """Original regex cascade, kept as the reference implementation"""
+    t = text.lower().strip()
+
+    # === STEP 1: Check for BOOSTER PUMP FIRST (highest priority) ===
+    if re.search(r'\bbooster\s*pump\b', t):
+        return 'bp'
+    # Allow up to 10 words between "booster" and "pump"
+    if re.search(r'\bbooster\b(?:\s+\w+){0,10}\s+\bpump\b', t):
+        return 'bp'
+    # Match "BP" only if not part of "HR" or "FE"
+    if re.search(r'\bbp\b', t) and not re.search(r'\bhr\b|\bfe\b', t):
+        return 'bp'
+    # Partial match (only if not part of "fire extinguisher")
+    if 'booster pump' in t and 'fire extinguisher' not in t:
+        return 'bp'
+
+    # === STEP 2: Check for TRANSFER PUMP (second priority) ===
+    if re.search(r'\btransfer\s*pump\b', t):
+        return 'tp'
+    # Allow up to 10 words between "transfer" and "pump"
+    if re.search(r'\btransfer\b(?:\s+\w+){0,10}\s+\bpump\b', t):
+        return 'tp'
+    # Allow "pump" before "transfer"
+    if re.search(r'\bpump\b(?:\s+\w+){0,10}\s+\btransfer\b', t):
+        return 'tp'
+    # Match "TP" only if not part of "HR" or "FE"
+    if re.search(r'\btp\b', t) and not re.search(r'\bhr\b|\bfe\b', t):
+        return 'tp'
+    # Partial match (only if not part of "hosereel" or "fire extinguisher")
+    if 'transfer pump' in t and 'hosereel' not in t and 'fire extinguisher' not in t:
+        return 'tp'
+
+    # === STEP 3: Check for HOSEREEL (third priority) ===
+    if re.search(r'\bhosereel\b', t):
+        return 'hr'
+    # Match "HR" only if not part of "BP" or "TP"
+    if re.search(r'\bhr\b', t) and not re.search(r'\bbp\b|\btp\b', t):
+        return 'hr'
+    # Partial match (only if not part of "fire extinguisher" or "transfer pump")
+    if 'hosereel' in t and 'fire extinguisher' not in t and 'transfer pump' not in t:
+        return 'hr'
+
+    # === STEP 4: Check for FIRE EXTINGUISHER (last resort) ===
+    if re.search(r'\bfire\s*extinguisher\b', t):
+        return 'fe'
+    # Match "FE" only if not part of "BP" or "TP"
+    if re.search(r'\bfe\b', t) and not re.search(r'\bbp\b|\btp\b', t):
+        return 'fe'
+    # Partial match (only if not part of "hosereel" or "transfer pump")
+    if 'fire extinguisher' in t and 'hosereel' not in t and 'transfer pump' not in t:
+        return 'fe'
+
+    # === STEP 5: Check for ABBREVIATIONS (fallback) ===
+    if 'bp' in t and 'fe' not in t and 'tp' not in t and 'hr' not in t:
+        return 'bp'
+    if 'tp' in t and 'fe' not in t and 'hr' not in t:
+        return 'tp'
+    if 'hr' in t and 'fe' not in t and 'bp' not in t and 'tp' not in t:
+        return 'hr'
+    if 'fe' in t and 'hr' not in t and 'bp' not in t and 'tp' not in t:
+        return 'fe'
+    if 'rhe' in t:
+        return 'rhe'
+    if 'pt' in t:
+        return 'pt'
+
+    # === DEFAULT ===
+    return 'other'
+
+def replay_time(fn, texts, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('log_csv', nargs='?', default=LOG_FILE)
+    parser.add_argument('--repeats', type=int, default=10)
+    args = parser.parse_args()
+
+    with open(args.log_csv, 'r') as f:
+        texts = [row['ocr_text'] for row in csv.DictReader(f)]
+
+    mismatches = [t for t in texts if extract_equipment_type(t) != legacy_extract_equipment_type(t)]
+    print(f"Rows: {len(texts)}")
+    if mismatches:
+        print(f"❌ {len(mismatches)} label mismatches, e.g. {mismatches[0][:80]!r}")
+    else:
+        print("✅ Labels identical to the original cascade")
+
+    before = replay_time(legacy_extract_equipment_type, texts, args.repeats)
+    after = replay_time(extract_equipment_type, texts, args.repeats)
+    print(f"Original cascade: {before * 1000:8.1f} ms/replay ({len(texts) / before:,.0f} rows/sec)")
+    print(f"Single pass:      {after * 1000:8.1f} ms/replay ({len(texts) / after:,.0f} rows/sec)")
+    speedup = before / after
+    print(f"Speedup: {speedup:.1f}x" + ("" if speedup >= TARGET_SPEEDUP else f" (below the {TARGET_SPEEDUP:.0f}x target)"))
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Compare OCR engines (ocr_backends) on the same photos: watermark OCR
+(batched, as with --ocr-batch) and full-image OCR per engine, with
+block+road accuracy of the full-OCR extraction and of the tiered fast path,
+and images/sec. Uses labelled renamed photos by default, or the synthetic
+corpus of bench_pipeline.py with --synthetic. Prints the fastest engine
+whose accuracy is within --tolerance of the most accurate one.
+
+Usage:
+    python bench_ocr_backends.py [--backends easyocr,tesseract] [--sample 50] [--batch 8] [--cpu]
+    python bench_ocr_backends.py --synthetic --count 50
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+
+import rename_images
+from rename_images import (
+    LOG_FILE, DEST_DIR, load_image, crop_watermark_precise, resize_for_batch, ocr_watermarks_batched,
+    ocr_full_image, extract_ground_truth_from_full_ocr, extract_from_watermark,
+)
+from ocr_backends import OCR_BACKENDS, make_backend
+from bench_pipeline import BENCH_LOG_FILE, build_corpus
+from sweep_resolution import load_sample
+
+def bench_backend(backend, sample, images, batch):
+    """OCR the sample with one engine; returns the per-engine numbers"""
+    rename_images.ocr_reader = backend  # The pipeline functions below use get_ocr_reader()
+    crops = [resize_for_batch(crop_watermark_precise(path, img=img)) for (path, _), img in zip(sample, images)]
+
+    start = time.perf_counter()
+    watermark_boxes = []
+    for i in range(0, len(crops), batch):
+        watermark_boxes += ocr_watermarks_batched(crops[i:i + batch])
+    watermark_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    full_texts = [" ".join(ocr_full_image(img)) for img in images]
+    full_s = time.perf_counter() - start
+
+    full_ok = fast = fast_ok = 0
+    for (_, row), boxes, full_ocr in zip(sample, watermark_boxes, full_texts):
+        labels = (row['block'], row['road'])
+        block, road, _, _ = extract_ground_truth_from_full_ocr(full_ocr)
+        full_ok += (block, road) == labels
+        watermark_ocr = " ".join(text for _, text, _ in boxes)
+        accepted = extract_from_watermark(watermark_ocr, boxes=[(text, conf) for _, text, conf in boxes])
+        if accepted:
+            fast += 1
+            fast_ok += accepted[:2] == labels
+    n = len(sample)
+    return {
+        'backend': backend.name,
+        'watermark_ms': 1000 * watermark_s / n,
+        'full_ms': 1000 * full_s / n,
+        'images_per_sec': n / (watermark_s + full_s),
+        'full_accuracy': full_ok / n,
+        'fast_path_share': fast / n,
+        'fast_path_accuracy': fast_ok / fast if fast else None,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare OCR engines on accuracy and images/sec")
+    parser.add_argument('--backends', default=",".join(OCR_BACKENDS))
+    parser.add_argument('--log', default=LOG_FILE)
+    parser.add_argument('--images', default=DEST_DIR, help="Folder of renamed photos")
+    parser.add_argument('--sample', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--synthetic', action='store_true', help="Use bench_pipeline.py's synthetic corpus")
+    parser.add_argument('--corpus', default=os.path.join(tempfile.gettempdir(), 'rename_images_bench_corpus'))
+    parser.add_argument('--count', type=int, default=50, help="--synthetic: photos to render")
+    parser.add_argument('--batch', type=int, default=8, help="Watermark crops per batched OCR call")
+    parser.add_argument('--tolerance', type=float, default=0.01,
+                        help="Accuracy drop (fraction) accepted for a faster engine")
+    parser.add_argument('--cpu', action='store_true', help="Run EasyOCR on CPU (as on a server without a GPU)")
+    parser.add_argument('--json', help="Write the results here")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        sample = build_corpus(args.corpus, BENCH_LOG_FILE, args.count, (1600, 1200), args.seed)
+    else:
+        sample = load_sample(args.log, args.images, args.sample, args.seed)
+    if not sample:
+        print("❌ No labelled photos to benchmark")
+        raise SystemExit(1)
+    images = [load_image(path) for path, _ in sample]
+    print(f"Sample: {len(sample)} photos, watermark batch {args.batch}\n")
+
+    results = []
+    for name in args.backends.split(','):
+        try:
+            backend = make_backend(name, gpu=not args.cpu)
+        except Exception as e:
+            print(f"⚠️ Skipping {name}: {e}")
+            continue
+        backend.readtext(images[0], detail=0)  # Warm-up, so first-call setup isn't timed
+        result = bench_backend(backend, sample, images, args.batch)
+        results.append(result)
+        fast_acc = result['fast_path_accuracy']
+        print(f"{name:10s} {result['images_per_sec']:6.2f} images/sec  "
+              f"(watermark {result['watermark_ms']:7.1f} ms, full {result['full_ms']:7.1f} ms per image)  "
+              f"block+road {100 * result['full_accuracy']:5.1f}%  "
+              f"fast path {100 * result['fast_path_share']:5.1f}% of images"
+              + (f", {100 * fast_acc:.1f}% right" if fast_acc is not None else ""))
+
+    if not results:
+        print("❌ No OCR engine could be loaded")
+        raise SystemExit(1)
+    best_accuracy = max(r['full_accuracy'] for r in results)
+    good_enough = [r for r in results if r['full_accuracy'] >= best_accuracy - args.tolerance]
+    choice = max(good_enough, key=lambda r: r['images_per_sec'])
+    print(f"\n✅ Fastest engine within {100 * args.tolerance:.0f}% of the best accuracy: {choice['backend']} "
+          f"(set OCR_BACKEND or pass --ocr-backend {choice['backend']})")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'images': len(sample),
+                       'batch': args.batch, 'cpu': args.cpu, 'results': results}, f, indent=2)
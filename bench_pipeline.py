@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Per-stage pipeline benchmark on a synthetic watermark corpus.
+Renders photo-sized JPEGs with real watermark strings from success_log.csv
+(cv2.putText into the bottom-left band), then times every stage of the
+pipeline on them: decode, crop, watermark OCR, full OCR, extraction,
+CSV logging and file placement. Nothing outside a scratch folder is touched.
+
+Usage:
+    python bench_pipeline.py [--count 50] [--json bench.json] [--baseline old.json]
+    python bench_pipeline.py --no-ocr      # decode/crop/extract/log/place only
+"""
+import os
+import csv
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+
+import cv2
+import numpy as np
+
+import rename_images
+from rename_images import (
+    load_image, crop_watermark_precise, ocr_full_image, get_ocr_reader,
+    extract_ground_truth_from_full_ocr, log_success, save_training_pair, get_results_sink,
+)
+from file_placement import move_file, link_or_copy
+from run_metrics import percentile
+
+# The success log checked in next to this script, so the benchmark runs anywhere
+BENCH_LOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'success_log.csv')
+
+STAGES = ('decode', 'crop', 'watermark_ocr', 'full_ocr', 'extraction', 'logging', 'placement')
+
+def wrap_watermark(text, width=32):
+    """Split a logged OCR string into watermark-like lines"""
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + 1 + len(word) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}".strip()
+    if line:
+        lines.append(line)
+    return lines[:6]
+
+def render_photo(text, width, height, rng):
+    """A noisy 'site photo' with the watermark text in the bottom-left 40% x 30%"""
+    # Smooth gradient + texture, so the JPEG is about as expensive to decode as a real photo
+    grid = (height // 64 + 1, width // 64 + 1)
+    small = rng.integers(60, 190, size=(*grid, 1)) + rng.integers(-25, 25, size=(*grid, 3))  # Muted colours
+    img = cv2.resize(np.clip(small, 0, 255).astype(np.uint8), (width, height), interpolation=cv2.INTER_CUBIC)
+    noise = rng.integers(-20, 20, size=img.shape, dtype=np.int16)
+    img = np.clip(img.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+    lines = wrap_watermark(text)
+    band_w, band_h = int(width * 0.40), int(height * 0.30)
+    scale = max(0.4, band_w / 32 / 20)  # ~32 characters across the band
+    thickness = max(1, round(scale * 2))
+    line_h = int(30 * scale)
+    y = height - band_h + (band_h - line_h * len(lines)) // 2 + line_h
+    for line in lines:
+        org = (int(width * 0.02), y)
+        cv2.putText(img, line, org, cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 0), thickness + 2, cv2.LINE_AA)
+        cv2.putText(img, line, org, cv2.FONT_HERSHEY_SIMPLEX, scale, (255, 255, 255), thickness, cv2.LINE_AA)
+        y += line_h
+    return img
+
+def build_corpus(corpus_dir, log_file, count, size, seed):
+    """Render (or reuse) the corpus; returns [(path, logged row)]"""
+    spec = {'log_file': os.path.abspath(log_file), 'count': count, 'size': list(size), 'seed': seed}
+    spec_path = os.path.join(corpus_dir, 'corpus.json')
+    if os.path.exists(spec_path):
+        with open(spec_path, 'r') as f:
+            saved = json.load(f)
+        if saved['spec'] == spec:
+            return [(os.path.join(corpus_dir, name), row) for name, row in saved['images']]
+
+    with open(log_file, 'r') as f:
+        rows = [row for row in csv.DictReader(f) if row['ocr_text'].strip()]
+    rng = random.Random(seed)
+    rows = rng.sample(rows, min(count, len(rows)))
+    np_rng = np.random.default_rng(seed)
+
+    os.makedirs(corpus_dir, exist_ok=True)
+    images = []
+    width, height = size
+    for i, row in enumerate(rows):
+        # Every 4th photo is portrait, like phone uploads
+        w, h = (height, width) if i % 4 == 3 else (width, height)
+        name = f"synthetic_{i:04d}.jpg"
+        cv2.imwrite(os.path.join(corpus_dir, name), render_photo(row['ocr_text'], w, h, np_rng),
+                    [cv2.IMWRITE_JPEG_QUALITY, 90])
+        images.append((name, row))
+    with open(spec_path, 'w') as f:
+        json.dump({'spec': spec, 'images': images}, f)
+    print(f"🖼️  Rendered {len(images)} synthetic photos into '{corpus_dir}'")
+    return [(os.path.join(corpus_dir, name), row) for name, row in images]
+
+def run_benchmark(corpus, scratch_dir, with_ocr):
+    """Time each stage per image; returns ({stage: [seconds]}, block+road accuracy)"""
+    # Point every output of the pipeline at the scratch folder
+    rename_images.LOG_FILE = os.path.join(scratch_dir, 'success_log.csv')
+    rename_images.ML_TRAINING_DATA = os.path.join(scratch_dir, 'ml_training_data.csv')
+    rename_images.CORRECTION_RULES_FILE = os.path.join(scratch_dir, 'correction_rules.json')
+    rename_images.RESULTS_JOURNAL_DIR = os.path.join(scratch_dir, 'journal')
+    rename_images.OCR_CACHE_FILE = None  # Measure OCR, not cache hits
+    src_dir = os.path.join(scratch_dir, 'src')
+    dest_dir = os.path.join(scratch_dir, 'dest')
+    failed_dir = os.path.join(scratch_dir, 'failed')
+    for folder in (src_dir, dest_dir, failed_dir):
+        os.makedirs(folder)
+
+    timings = {stage: [] for stage in STAGES}
+    correct = 0
+    for path, row in corpus:
+        src_path = os.path.join(src_dir, os.path.basename(path))
+        shutil.copy2(path, src_path)
+        with open(src_path, 'rb') as f:
+            data = f.read()
+
+        start = time.perf_counter()
+        img = load_image(src_path, data=data)
+        timings['decode'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        crop = crop_watermark_precise(src_path, img=img)
+        timings['crop'].append(time.perf_counter() - start)
+
+        if with_ocr:
+            start = time.perf_counter()
+            watermark_ocr = " ".join(get_ocr_reader().readtext(crop, detail=0))
+            timings['watermark_ocr'].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            full_ocr = " ".join(ocr_full_image(img))
+            timings['full_ocr'].append(time.perf_counter() - start)
+        else:
+            # Extraction still gets realistic input: the string the photo was rendered from
+            watermark_ocr = full_ocr = row['ocr_text']
+
+        start = time.perf_counter()
+        block, road, date_str, equipment = extract_ground_truth_from_full_ocr(full_ocr)
+        timings['extraction'].append(time.perf_counter() - start)
+        if block == row['block'] and road == row['road']:
+            correct += 1
+
+        # Same as apply_result(): successes are logged and moved, failures linked into failed/
+        name = os.path.basename(src_path)
+        if block and road:
+            start = time.perf_counter()
+            save_training_pair(name, watermark_ocr, block, road, equipment, date_str)
+            log_success(name, watermark_ocr, block, road, equipment, date_str)
+            timings['logging'].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            move_file(src_path, os.path.join(dest_dir, f"{equipment}_{block}_{road}_{name}"))
+            timings['placement'].append(time.perf_counter() - start)
+        else:
+            start = time.perf_counter()
+            link_or_copy(src_path, os.path.join(failed_dir, name))
+            timings['placement'].append(time.perf_counter() - start)
+
+    # The buffered rows are part of the logging cost (close before the scratch folder goes)
+    start = time.perf_counter()
+    get_results_sink().close()
+    if timings['logging']:
+        timings['logging'][-1] += time.perf_counter() - start
+
+    accuracy = correct / len(corpus)
+    return {stage: values for stage, values in timings.items() if values}, accuracy
+
+def summarize(timings):
+    summary = {}
+    for stage, values in timings.items():
+        summary[stage] = {
+            'mean_ms': 1000 * sum(values) / len(values),
+            'p50_ms': 1000 * percentile(values, 50),
+            'p95_ms': 1000 * percentile(values, 95),
+            'total_s': sum(values),
+        }
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage benchmark on synthetic watermarked photos")
+    parser.add_argument('--log', default=BENCH_LOG_FILE, help="success_log.csv to take watermark strings from")
+    parser.add_argument('--corpus', default=os.path.join(tempfile.gettempdir(), 'rename_images_bench_corpus'))
+    parser.add_argument('--count', type=int, default=50)
+    parser.add_argument('--size', default="1600x1200", help="Landscape WxH (WhatsApp exports are 1600px)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-ocr', action='store_true', help="Skip the OCR stages (no EasyOCR needed)")
+    parser.add_argument('--cpu', action='store_true')
+    parser.add_argument('--json', help="Write the results here")
+    parser.add_argument('--baseline', help="Earlier --json output to compare against")
+    args = parser.parse_args()
+
+    size = tuple(int(v) for v in args.size.lower().split('x'))
+    corpus = build_corpus(args.corpus, args.log, args.count, size, args.seed)
+    if not corpus:
+        print(f"❌ No watermark strings found in '{args.log}'")
+        raise SystemExit(1)
+
+    if not args.no_ocr:
+        get_ocr_reader(gpu=not args.cpu)
+
+    scratch_dir = tempfile.mkdtemp(prefix='rename_images_bench_')
+    try:
+        started = time.perf_counter()
+        timings, accuracy = run_benchmark(corpus, scratch_dir, with_ocr=not args.no_ocr)
+        wall = time.perf_counter() - started
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    summary = summarize(timings)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)['stages']
+
+    print(f"Images: {len(corpus)} ({args.size}, every 4th portrait)  "
+          f"{len(corpus) / wall:.2f} images/sec end to end")
+    for stage, s in summary.items():
+        line = f"{stage:14s} mean {s['mean_ms']:8.2f} ms  p50 {s['p50_ms']:8.2f}  p95 {s['p95_ms']:8.2f}"
+        if baseline and stage in baseline:
+            line += f"  ({baseline[stage]['mean_ms'] / s['mean_ms']:.2f}x vs baseline)"
+        print(line)
+    label = "OCR" if not args.no_ocr else "logged string"
+    print(f"Block+road accuracy (extraction on {label}): {100 * accuracy:.1f}%")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'images': len(corpus),
+                'size': args.size,
+                'ocr': not args.no_ocr,
+                'gpu': not args.cpu and not args.no_ocr,
+                'machine': {'python': platform.python_version(), 'cpus': os.cpu_count(), 'opencv': cv2.__version__},
+                'images_per_sec': len(corpus) / wall,
+                'accuracy': accuracy,
+                'stages': summary,
+            }, f, indent=2)
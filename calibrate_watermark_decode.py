@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Pick the watermark-crop decode reduction (WATERMARK_DECODE_PROFILE) from a
+measured accuracy check. For each reduction (full-size grayscale, 1/2, 1/4,
+1/8 JPEG DCT scaling) it decodes a labelled sample of renamed photos, OCRs
+the watermark crop and extracts block/road from it, then writes the largest
+reduction whose accuracy stays within --tolerance of full size.
+
+Usage: python calibrate_watermark_decode.py [--sample 100] [--reductions 1,2,4,8] [--dry-run]
+"""
+import json
+import time
+import argparse
+import tracemalloc
+
+from rename_images import (
+    LOG_FILE, DEST_DIR, WATERMARK_DECODE_PROFILE, load_image, crop_watermark_precise,
+    load_watermark_crop, get_ocr_reader, extract_ground_truth_from_full_ocr,
+)
+from sweep_resolution import load_sample
+
+def peak_bytes(fn):
+    """Peak bytes allocated while fn() runs (numpy/cv2 arrays are traced)"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def evaluate(sample, datas, reduction):
+    """(block+road accuracy, decode+crop ms/image, peak decode bytes/image)"""
+    correct = 0
+    decode_s = 0.0
+    peak = 0
+    for (path, row), data in zip(sample, datas):
+        start = time.perf_counter()
+        crop = load_watermark_crop(path, data=data, reduction=reduction)
+        decode_s += time.perf_counter() - start
+        peak = max(peak, peak_bytes(lambda: load_watermark_crop(path, data=data, reduction=reduction)))
+        watermark_ocr = " ".join(get_ocr_reader().readtext(crop, detail=0))
+        block, road, _, _ = extract_ground_truth_from_full_ocr(watermark_ocr)
+        if block == row['block'] and road == row['road']:
+            correct += 1
+    n = len(sample)
+    return correct / n, 1000 * decode_s / n, peak
+
+def colour_decode_cost(sample, datas):
+    """ms/image and peak bytes of the shared colour decode + crop used without a profile"""
+    start = time.perf_counter()
+    for (path, _), data in zip(sample, datas):
+        crop_watermark_precise(path, img=load_image(path, data=data))
+    elapsed = time.perf_counter() - start
+    peak = max(peak_bytes(lambda: crop_watermark_precise(path, img=load_image(path, data=data)))
+               for (path, _), data in zip(sample, datas))
+    return 1000 * elapsed / len(sample), peak
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Choose the watermark decode reduction from measured accuracy")
+    parser.add_argument('--log', default=LOG_FILE)
+    parser.add_argument('--images', default=DEST_DIR, help="Folder of renamed photos")
+    parser.add_argument('--sample', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--reductions', default="1,2,4,8")
+    parser.add_argument('--tolerance', type=float, default=0.0,
+                        help="Accuracy drop (fraction) allowed vs full-size decode")
+    parser.add_argument('--profile', default=WATERMARK_DECODE_PROFILE, help="Where to write the choice")
+    parser.add_argument('--dry-run', action='store_true', help="Only report, don't write the profile")
+    parser.add_argument('--cpu', action='store_true')
+    args = parser.parse_args()
+
+    sample = load_sample(args.log, args.images, args.sample, args.seed)
+    if not sample:
+        print(f"❌ No logged photos found in '{args.images}'")
+        raise SystemExit(1)
+    print(f"Sample: {len(sample)} labelled photos")
+    datas = []
+    for path, _ in sample:
+        with open(path, 'rb') as f:
+            datas.append(f.read())
+
+    get_ocr_reader(gpu=not args.cpu)
+    colour_ms, colour_peak = colour_decode_cost(sample, datas)
+    print(f"Colour decode + crop (shared path): {colour_ms:6.1f} ms/image, peak {colour_peak / 1e6:6.1f} MB")
+
+    results = []
+    for reduction in sorted(int(r) for r in args.reductions.split(',')):
+        accuracy, decode_ms, peak = evaluate(sample, datas, reduction)
+        results.append({'reduction': reduction, 'accuracy': accuracy,
+                        'decode_ms': decode_ms, 'peak_bytes': peak})
+        print(f"1/{reduction} grayscale: block+road accuracy {100 * accuracy:5.1f}%  "
+              f"{decode_ms:6.1f} ms/image ({colour_ms / decode_ms:.1f}x)  "
+              f"peak {peak / 1e6:6.2f} MB ({colour_peak / peak:.0f}x less)")
+
+    baseline = results[0]
+    keeps_accuracy = [r for r in results if r['accuracy'] >= baseline['accuracy'] - args.tolerance]
+    best = max(keeps_accuracy, key=lambda r: r['reduction'])
+    print(f"\n✅ Largest reduction that keeps accuracy: 1/{best['reduction']}")
+
+    if not args.dry_run:
+        with open(args.profile, 'w') as f:
+            json.dump({'reduction': best['reduction'], 'sample': len(sample), 'tolerance': args.tolerance,
+                       'colour_decode_ms': colour_ms, 'results': results}, f, indent=2)
+        print(f"   Written to '{args.profile}' (used by --tiered runs)")
@@ -0,0 +1,138 @@
+# correction_rules.py — learned OCR → correct mappings, kept in memory
+
+import os
+import re
+import csv
+import json
+import tempfile
+from collections import Counter
+
+def learn_corrections_from_row(ocr_text, correct_block, correct_road):
+    """Return the (corrupted, correct) pairs one success-log row teaches us"""
+    learned = []
+    block_num = re.sub(r'[A-Za-z]', '', correct_block)
+    if block_num:
+        corrupted_match = re.search(rf'\b{block_num}[\/\\,\s]?\b', ocr_text)
+        if corrupted_match:
+            corrupted = corrupted_match.group().strip()
+            if corrupted != correct_block:
+                learned.append((corrupted, correct_block))
+    if 'yishun' in correct_road.lower():
+        yishun_match = re.search(r'\b(Yi[shn]*[ea]?)\b', ocr_text, re.IGNORECASE)
+        if yishun_match:
+            bad_yishun = yishun_match.group()
+            if bad_yishun.lower() != 'yishun':
+                learned.append((bad_yishun, 'Yishun'))
+    return learned
+
+class CorrectionRuleIndex:
+    """
+    Correction rules learned from the success log, built once per process.
+    - Cold start loads a JSON sidecar and only scans log rows appended since
+      it was written (full scan only if the sidecar is missing or stale).
+      Only the process that owns the log rewrites the sidecar (load(save=True));
+      worker processes just catch up in memory.
+    - learn() updates the index as new successes are logged.
+    - apply() rewrites whole tokens in one pass over a compiled alternation.
+    - known_road() says whether a road name has been logged often enough to
+      trust a read of it without the full-image OCR.
+    """
+
+    def __init__(self, log_file, sidecar_file):
+        self.log_file = log_file
+        self.sidecar_file = sidecar_file
+        self.rules = {}       # corrupted.lower() → correct
+        self.roads = Counter()  # logged road → successes
+        self.log_offset = 0   # bytes of log_file already folded into self.rules
+        self._pattern = None
+
+    def load(self, save=True):
+        if os.path.exists(self.sidecar_file):
+            try:
+                with open(self.sidecar_file, 'r') as f:
+                    data = json.load(f)
+                if 'roads' in data:  # Sidecars from before road counts get rebuilt by the full scan below
+                    self.rules = data['rules']
+                    self.roads = Counter(data['roads'])
+                    self.log_offset = data['log_offset']
+            except Exception as e:
+                print(f"⚠️ Ignoring unreadable correction sidecar: {e}")
+                self.rules, self.roads, self.log_offset = {}, Counter(), 0
+
+        log_size = os.path.getsize(self.log_file) if os.path.exists(self.log_file) else 0
+        if log_size < self.log_offset:
+            # Log was truncated or replaced: the sidecar no longer describes it
+            self.rules, self.roads, self.log_offset = {}, Counter(), 0
+        if log_size > self.log_offset:
+            self._scan_log()
+            if save:
+                self.save()
+        return self
+
+    def _scan_log(self):
+        """Fold rows past self.log_offset into the index"""
+        try:
+            with open(self.log_file, 'r', newline='') as f:
+                # readline(), not iteration, so f.tell() stays usable
+                header = f.readline()
+                if not header:
+                    return
+                fieldnames = next(csv.reader([header]))
+                if self.log_offset > f.tell():
+                    f.seek(self.log_offset)
+                for row in csv.DictReader(iter(f.readline, ''), fieldnames=fieldnames):
+                    self.learn(row['ocr_text'], row['block'], row['road'])
+                self.log_offset = f.tell()
+        except Exception as e:
+            print(f"⚠️ Error reading log: {e}")
+
+    def save(self):
+        tmp_path = None
+        try:
+            # Unique temp name: two processes saving at once must not share (and tear) one file
+            with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(os.path.abspath(self.sidecar_file)),
+                                             prefix=os.path.basename(self.sidecar_file) + '.',
+                                             suffix='.tmp', delete=False) as f:
+                tmp_path = f.name
+                json.dump({'log_offset': self.log_offset, 'rules': self.rules, 'roads': self.roads},
+                          f, separators=(',', ':'))
+            os.replace(tmp_path, self.sidecar_file)
+        except Exception as e:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            print(f"⚠️ Error saving correction sidecar: {e}")
+
+    def learn(self, ocr_text, correct_block, correct_road):
+        """Add rules from one successful row; returns True if the index changed"""
+        changed = False
+        self.roads[correct_road] += 1
+        for bad, good in learn_corrections_from_row(ocr_text, correct_block, correct_road):
+            key = bad.lower()
+            if self.rules.get(key) != good:
+                self.rules[key] = good
+                changed = True
+        if changed:
+            self._pattern = None
+        return changed
+
+    def record_append(self, start_offset, end_offset):
+        """Note that log bytes [start_offset, end_offset) were learned via learn()"""
+        if self.log_offset == start_offset:
+            self.log_offset = end_offset
+
+    def known_road(self, road, min_count):
+        return self.roads[road] >= min_count
+
+    def as_dict(self):
+        return dict(self.rules)
+
+    def apply(self, text):
+        if not self.rules:
+            return text
+        if self._pattern is None:
+            # Longest first, so "505/" wins over "505" at the same position. Whole tokens only:
+            # unanchored, "yi" → "Yishun" turns a correct "Yishun" into "Yishunun", and
+            # "246" → "246B" rewrites the middle of postal code 762469
+            alternation = '|'.join(re.escape(bad) for bad in sorted(self.rules, key=len, reverse=True))
+            self._pattern = re.compile(rf'(?<![0-9A-Za-z])(?:{alternation})(?![0-9A-Za-z])', re.IGNORECASE)
+        return self._pattern.sub(lambda m: self.rules.get(m.group().lower(), m.group()), text)
@@ -0,0 +1,68 @@
+# file_placement.py — move/link photos into output folders without rewriting them
+
+import os
+import errno
+import shutil
+
+def _temp_name(dest_path):
+    """Hidden sibling of dest_path, so the final rename stays on one filesystem"""
+    folder, name = os.path.split(dest_path)
+    return os.path.join(folder, f".{name}.{os.getpid()}.tmp")
+
+def _copy_into_place(src_path, dest_path):
+    """Copy to a temp name, fsync, then rename: dest_path is either absent or complete"""
+    tmp_path = _temp_name(dest_path)
+    try:
+        shutil.copy2(src_path, tmp_path)
+        with open(tmp_path, 'rb+') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def move_file(src_path, dest_path):
+    """
+    Move src_path to dest_path (overwriting it).
+    Same filesystem: a single rename, no data is written.
+    Across devices: crash-safe copy into place, then the source is removed.
+    Returns 'rename' or 'copy'.
+    """
+    try:
+        os.replace(src_path, dest_path)
+        # rename() is a no-op when both names are already links to one file
+        if os.path.exists(src_path) and os.path.samefile(src_path, dest_path):
+            os.remove(src_path)
+        return 'rename'
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    _copy_into_place(src_path, dest_path)
+    os.remove(src_path)
+    return 'copy'
+
+def link_or_copy(src_path, dest_path):
+    """
+    Put a copy of src_path at dest_path while keeping the source.
+    Uses a hardlink when possible (same filesystem, no data written),
+    otherwise a crash-safe copy. Returns 'link' or 'copy'.
+    """
+    if os.path.exists(dest_path) and os.path.samefile(src_path, dest_path):
+        return 'link'  # Already linked by an earlier run
+    tmp_path = _temp_name(dest_path)
+    for attempt in range(2):
+        try:
+            os.link(src_path, tmp_path)
+            os.replace(tmp_path, dest_path)
+            return 'link'
+        except FileExistsError:
+            # Leftover from a crashed run: clear it and link again (copy only if it keeps reappearing)
+            os.remove(tmp_path)
+        except OSError as e:
+            # EXDEV: other device; EPERM/ENOTSUP/EMLINK: filesystem (SMB, FAT...) can't hardlink
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.ENOTSUP, errno.EOPNOTSUPP, errno.EMLINK):
+                raise
+            break
+    _copy_into_place(src_path, dest_path)
+    return 'copy'
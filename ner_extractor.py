@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+NER extraction backend: the spaCy model trained by train_ner_model.py
+(BLOCK / ROAD labels) applied to watermark OCR strings in batches.
+Falls back to the regex extractor when the model's output is not confident.
+
+Evaluate against ml_training_data.csv:
+    python ner_extractor.py [--batch-size N] [--n-process N]
+"""
+import os
+import re
+import csv
+import time
+import argparse
+
+from rename_images import (
+    ML_TRAINING_DATA, clean_road_name, parse_date_from_text,
+    extract_equipment_type, extract_ground_truth_from_full_ocr,
+)
+
+NER_MODEL_DIR = "/Users/alfredlim/Redpower/rename_images/ner_model"
+
+def installed_model_dir(model_dir=NER_MODEL_DIR):
+    """
+    model_dir, or the model train_ner_model.install_model() retired to
+    <model_dir>.old when a crash (or a load) caught it between its two renames
+    """
+    retired = model_dir.rstrip('/') + '.old'
+    if not os.path.exists(model_dir) and os.path.exists(retired):
+        return retired
+    return model_dir
+
+def normalize_block(block_text):
+    """'462a,' → '462A', or None if it isn't a plausible block number"""
+    block = re.sub(r'[^0-9A-Za-z]', '', block_text).upper()
+    num_part = re.sub(r'[A-Z]', '', block)
+    if not num_part.isdigit() or not 100 <= int(num_part) <= 9999 or 2000 <= int(num_part) <= 2099:
+        return None
+    return block
+
+class NERExtractor:
+    """
+    Loads ner_model once and runs it over batches of OCR strings with nlp.pipe().
+    extract_batch() returns one (block, road, date_str, equipment, source) tuple
+    per text, where source is 'ner' or 'regex' (low-confidence fallback).
+    """
+
+    def __init__(self, model_dir=NER_MODEL_DIR, batch_size=256, n_process=1):
+        import spacy
+        self.nlp = spacy.load(installed_model_dir(model_dir))
+        self.batch_size = batch_size
+        self.n_process = n_process
+
+    def _from_doc(self, doc):
+        """Block/road from one doc, or None when the entities aren't confident"""
+        blocks = {normalize_block(ent.text) for ent in doc.ents if ent.label_ == "BLOCK"}
+        blocks.discard(None)
+        # Confident only when the model found exactly one valid block
+        if len(blocks) != 1:
+            return None
+        roads = [ent.text for ent in doc.ents if ent.label_ == "ROAD" and 'yishun' in ent.text.lower()]
+        # Same convention as the regex extractor: bare "yishun" when the road is unknown
+        road = clean_road_name(roads[0]) if roads else "yishun"
+        return blocks.pop(), road
+
+    def extract_batch(self, texts):
+        results = []
+        docs = self.nlp.pipe(texts, batch_size=self.batch_size, n_process=self.n_process)
+        for text, doc in zip(texts, docs):
+            found = self._from_doc(doc)
+            if found:
+                block, road = found
+                equipment = extract_equipment_type(text)
+                if 'rhe' in text.lower():
+                    equipment = 'rhe'
+                results.append((block, road, parse_date_from_text(text), equipment, 'ner'))
+            else:
+                block, road, date_str, equipment = extract_ground_truth_from_full_ocr(text)
+                results.append((block, road, date_str, equipment, 'regex'))
+        return results
+
+    def extract(self, text):
+        return self.extract_batch([text])[0]
+
+_ner_extractor = None
+
+def get_ner_extractor():
+    """This process's NER extractor, loading the model on first use"""
+    global _ner_extractor
+    if _ner_extractor is None:
+        _ner_extractor = NERExtractor(NER_MODEL_DIR)
+    return _ner_extractor
+
+# --- EVALUATION ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput/accuracy of the NER backend vs the regex extractor")
+    parser.add_argument('--data', default=ML_TRAINING_DATA)
+    parser.add_argument('--model', default=NER_MODEL_DIR)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--n-process', type=int, default=1)
+    args = parser.parse_args()
+
+    with open(args.data, 'r') as f:
+        rows = list(csv.DictReader(f))
+    texts = [row['watermark_ocr'] for row in rows]
+
+    extractor = NERExtractor(args.model, batch_size=args.batch_size, n_process=args.n_process)
+
+    start = time.perf_counter()
+    ner_results = extractor.extract_batch(texts)
+    ner_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    regex_results = [extract_ground_truth_from_full_ocr(text) for text in texts]
+    regex_elapsed = time.perf_counter() - start
+
+    def score(results):
+        block_ok = sum(1 for r, row in zip(results, rows) if r[0] == row['block_label'])
+        both_ok = sum(1 for r, row in zip(results, rows)
+                      if r[0] == row['block_label'] and r[1] == row['road_label'])
+        return block_ok, both_ok
+
+    n = len(rows)
+    from_ner = sum(1 for r in ner_results if r[4] == 'ner')
+    print(f"Rows: {n}  (labels come from full-image OCR)")
+    for name, results, elapsed in (("NER + fallback", ner_results, ner_elapsed),
+                                   ("Regex only", regex_results, regex_elapsed)):
+        block_ok, both_ok = score(results)
+        print(f"{name:15s} block {100 * block_ok / n:5.1f}%  block+road {100 * both_ok / n:5.1f}%  "
+              f"{n / elapsed:8,.0f} rows/sec")
+    ner_only = [(r, row) for r, row in zip(ner_results, rows) if r[4] == 'ner']
+    if ner_only:
+        ner_block_ok = sum(1 for r, row in ner_only if r[0] == row['block_label'])
+        print(f"Resolved by NER: {from_ner}/{n} ({100 * from_ner / n:.1f}%), "
+              f"block accuracy on those {100 * ner_block_ok / len(ner_only):.1f}%")
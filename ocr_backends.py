@@ -0,0 +1,91 @@
+# ocr_backends.py — OCR engines behind one readtext()/readtext_batched() interface
+#
+# Every backend answers like EasyOCR: readtext(image, detail=0) → [text],
+# detail=1 → [(box, text, confidence)] with box = 4 [x, y] corners and
+# confidence in 0..1, so the pipeline, the OCR cache and the ROI learning
+# don't care which engine ran. Engines are imported lazily.
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+class OCRBackend:
+    name = None
+
+    def readtext(self, image, detail=1, **kwargs):
+        raise NotImplementedError
+
+    def readtext_batched(self, images, detail=1, batch_size=1, **kwargs):
+        """One result list per image (engines without native batching just loop)"""
+        return [self.readtext(image, detail=detail, **kwargs) for image in images]
+
+class EasyOCRBackend(OCRBackend):
+    """EasyOCR (PyTorch): CRAFT detector + CRNN recognizer, GPU if available"""
+    name = 'easyocr'
+
+    def __init__(self, gpu=True):
+        import easyocr
+        print("Initializing EasyOCR (may take a few seconds)...")
+        self.reader = easyocr.Reader(['en'], gpu=gpu)  # Falls back to CPU without CUDA/MPS
+
+    def readtext(self, image, detail=1, **kwargs):
+        return self.reader.readtext(image, detail=detail, **kwargs)
+
+    def readtext_batched(self, images, detail=1, batch_size=1, **kwargs):
+        return self.reader.readtext_batched(images, detail=detail, batch_size=batch_size, **kwargs)
+
+class TesseractBackend(OCRBackend):
+    """
+    Tesseract LSTM engine via pytesseract: CPU only, no model warm-up, and
+    much lighter than EasyOCR on servers without a GPU. Words are grouped
+    into lines (Tesseract's own block/paragraph/line numbers) to match
+    EasyOCR's line-level boxes. Each call is a tesseract subprocess, so a
+    batch runs on a thread pool with Tesseract's internal threading off.
+    EasyOCR-only keyword arguments (width_ths, ...) are ignored.
+    """
+    name = 'tesseract'
+
+    def __init__(self, gpu=False, config='--oem 1 --psm 3', threads=None):
+        import pytesseract
+        os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+        pytesseract.get_tesseract_version()  # Fail now if the binary is missing
+        self.pytesseract = pytesseract
+        self.config = config
+        self.threads = threads or os.cpu_count()
+
+    def readtext(self, image, detail=1, **kwargs):
+        import cv2
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        data = self.pytesseract.image_to_data(image, config=self.config,
+                                              output_type=self.pytesseract.Output.DICT)
+        lines = {}  # (block, paragraph, line) → [(left, top, width, height, text, conf)], in reading order
+        for i, text in enumerate(data['text']):
+            conf = float(data['conf'][i])
+            if conf < 0 or not text.strip():
+                continue
+            key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(key, []).append(
+                (data['left'][i], data['top'][i], data['width'][i], data['height'][i], text, conf))
+        results = []
+        for words in lines.values():
+            x0 = min(w[0] for w in words)
+            y0 = min(w[1] for w in words)
+            x1 = max(w[0] + w[2] for w in words)
+            y1 = max(w[1] + w[3] for w in words)
+            text = ' '.join(w[4] for w in words)
+            conf = sum(w[5] for w in words) / len(words) / 100
+            results.append(([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], text, conf))
+        return results if detail else [text for _, text, _ in results]
+
+    def readtext_batched(self, images, detail=1, batch_size=1, **kwargs):
+        if len(images) == 1 or self.threads == 1:
+            return super().readtext_batched(images, detail=detail)
+        with ThreadPoolExecutor(max_workers=min(len(images), self.threads)) as pool:
+            return list(pool.map(lambda image: self.readtext(image, detail=detail), images))
+
+OCR_BACKENDS = {backend.name: backend for backend in (EasyOCRBackend, TesseractBackend)}
+
+def make_backend(name, gpu=True):
+    if name not in OCR_BACKENDS:
+        raise ValueError(f"Unknown OCR backend '{name}' (choose from {', '.join(OCR_BACKENDS)})")
+    return OCR_BACKENDS[name](gpu=gpu)
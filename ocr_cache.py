@@ -0,0 +1,126 @@
+# ocr_cache.py — persistent OCR result cache keyed by image content
+
+import json
+import time
+import atexit
+import sqlite3
+import hashlib
+
+def content_hash(data):
+    """Hash of the raw file bytes (so renamed/re-forwarded copies still hit)"""
+    return hashlib.sha256(data).hexdigest()
+
+class OCRCache:
+    """
+    SQLite cache of readtext() outputs.
+    Key = file content hash + a params string describing the crop/preprocessing
+    and readtext arguments, so changing either misses instead of serving stale text.
+    Least-recently-used entries are evicted once the stored results exceed max_bytes.
+    Hits only note their access time in memory; the times are written in one
+    batch every touch_batch hits / touch_seconds (and on put() and close()).
+    The total stored size is kept in a one-row table, updated in the same
+    transaction as every insert/delete, so eviction never has to scan.
+    """
+
+    def __init__(self, db_path, max_bytes=512 * 1024 * 1024, touch_batch=64, touch_seconds=30.0):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.touch_batch = touch_batch
+        self.touch_seconds = touch_seconds
+        self._touched = {}  # (content_hash, params) → last access time not yet written
+        self._last_touch_flush = time.time()
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")  # workers read while one writes
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS ocr_results (
+                content_hash TEXT NOT NULL,
+                params TEXT NOT NULL,
+                result TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (content_hash, params)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON ocr_results(last_used)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL)"
+        )
+        # Caches created before the size table: one scan to seed it
+        self.conn.execute(
+            "INSERT OR IGNORE INTO cache_size VALUES (0, (SELECT COALESCE(SUM(size), 0) FROM ocr_results))"
+        )
+        self.conn.commit()
+        atexit.register(self.flush_touches)
+
+    def get(self, content_hash, params):
+        row = self.conn.execute(
+            "SELECT result FROM ocr_results WHERE content_hash = ? AND params = ?",
+            (content_hash, params),
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        self._touched[(content_hash, params)] = now
+        if len(self._touched) >= self.touch_batch or now - self._last_touch_flush >= self.touch_seconds:
+            self.flush_touches()
+        return json.loads(row[0])
+
+    def flush_touches(self):
+        """Write the pending access times (only ever moves last_used forward)"""
+        self._last_touch_flush = time.time()
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        try:
+            self.conn.executemany(
+                "UPDATE ocr_results SET last_used = MAX(last_used, ?) WHERE content_hash = ? AND params = ?",
+                [(used, key_hash, params) for (key_hash, params), used in touched.items()],
+            )
+            self.conn.commit()
+        except sqlite3.ProgrammingError:
+            pass  # Connection already closed
+
+    def put(self, content_hash, params, result):
+        payload = json.dumps(result, ensure_ascii=False)
+        with self.conn:
+            old = self.conn.execute(
+                "SELECT size FROM ocr_results WHERE content_hash = ? AND params = ?", (content_hash, params),
+            ).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ocr_results VALUES (?, ?, ?, ?, ?)",
+                (content_hash, params, payload, len(payload), time.time()),
+            )
+            self.conn.execute("UPDATE cache_size SET total = total + ? WHERE id = 0",
+                              (len(payload) - (old[0] if old else 0),))
+        self._touched.pop((content_hash, params), None)
+        self.flush_touches()
+        self._evict()
+
+    def _evict(self):
+        total = self.conn.execute("SELECT total FROM cache_size WHERE id = 0").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop oldest entries until we're back under 90% of the budget
+        target = int(self.max_bytes * 0.9)
+        doomed = []
+        freed = 0
+        for key_hash, params, size in self.conn.execute(
+            "SELECT content_hash, params, size FROM ocr_results ORDER BY last_used"
+        ):
+            if total - freed <= target:
+                break
+            doomed.append((key_hash, params))
+            freed += size
+        with self.conn:
+            deleted = 0
+            for key_hash, params in doomed:
+                row = self.conn.execute(
+                    "DELETE FROM ocr_results WHERE content_hash = ? AND params = ? RETURNING size",
+                    (key_hash, params),
+                ).fetchone()
+                deleted += row[0] if row else 0  # Another process may have evicted it already
+            self.conn.execute("UPDATE cache_size SET total = total - ? WHERE id = 0", (deleted,))
+
+    def close(self):
+        self.flush_touches()
+        self.conn.close()
@@ -0,0 +1,109 @@
+# photo_dedup.py — spot re-forwarded / resized copies of photos already processed
+
+import json
+import time
+import sqlite3
+
+HASH_BITS = 64
+CHUNKS = 4  # 16-bit chunks: any hash within CHUNKS - 1 bits shares at least one chunk exactly
+
+def perceptual_hash(data):
+    """
+    64-bit difference hash (dHash) of the encoded image bytes.
+    Decoded at 1/8 scale in grayscale (cheap for JPEGs), shrunk to 9x8 and
+    each pixel compared with its right neighbour, so re-compression and
+    resizing barely change it.
+    """
+    import cv2
+    import numpy as np
+    small = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if small is None:
+        raise ValueError("Cannot load image")
+    tiny = cv2.resize(small, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (tiny[:, 1:] > tiny[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+def _chunks(value):
+    width = HASH_BITS // CHUNKS
+    mask = (1 << width) - 1
+    return [(i, (value >> (i * width)) & mask) for i in range(CHUNKS)]
+
+class DuplicateIndex:
+    """
+    Persistent index of photos already extracted → extraction result.
+    find_exact() looks up an identical file by content hash; find() a
+    near-duplicate by perceptual hash. Stored in SQLite (shared by all workers) and mirrored in a multi-index
+    hash table in memory: the 64-bit hash is cut into 4 chunks, so every
+    hash within 3 bits of a query shares a chunk with it and lookup only
+    compares against that bucket. Rows added by other processes are picked
+    up on the next lookup.
+    """
+
+    def __init__(self, db_path, max_distance=3):
+        if max_distance >= CHUNKS:
+            raise ValueError(f"max_distance must be below {CHUNKS} for the multi-index lookup")
+        self.max_distance = max_distance
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS photo_hashes (
+                id INTEGER PRIMARY KEY,
+                phash TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                result TEXT NOT NULL,
+                added REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_photo_content_hash ON photo_hashes(content_hash)")
+        self.conn.commit()
+        self.buckets = [{} for _ in range(CHUNKS)]  # chunk value → [id]
+        self.entries = {}                           # id → (phash, content_hash, result)
+        self.last_id = 0
+
+    def _refresh(self):
+        rows = self.conn.execute(
+            "SELECT id, phash, content_hash, result FROM photo_hashes WHERE id > ? ORDER BY id", (self.last_id,)
+        ).fetchall()
+        for row_id, phash, content_hash, result in rows:
+            phash = int(phash, 16)  # Stored as hex: SQLite integers are signed 64-bit
+            self.entries[row_id] = (phash, content_hash, json.loads(result))
+            for i, chunk in _chunks(phash):
+                self.buckets[i].setdefault(chunk, []).append(row_id)
+            self.last_id = row_id
+
+    def find_exact(self, content_hash):
+        """Result of an earlier photo with exactly these bytes, or None"""
+        row = self.conn.execute(
+            "SELECT result FROM photo_hashes WHERE content_hash = ? ORDER BY id DESC LIMIT 1", (content_hash,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find(self, phash, accept=None):
+        """
+        (distance, content_hash, result) of the closest indexed photo within
+        max_distance whose result passes accept(result) if given, or None
+        """
+        self._refresh()
+        best = None
+        seen = set()
+        for i, chunk in _chunks(phash):
+            for row_id in self.buckets[i].get(chunk, ()):
+                if row_id in seen:
+                    continue
+                seen.add(row_id)
+                other, content_hash, result = self.entries[row_id]
+                distance = bin(phash ^ other).count('1')
+                if distance <= self.max_distance and (best is None or distance < best[0]) \
+                        and (accept is None or accept(result)):
+                    best = (distance, content_hash, result)
+        return best
+
+    def add(self, phash, content_hash, result):
+        self.conn.execute(
+            "INSERT INTO photo_hashes (phash, content_hash, result, added) VALUES (?, ?, ?, ?)",
+            (f"{phash:016x}", content_hash, json.dumps(result, ensure_ascii=False), time.time()),
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
@@ -3,11 +3,9 @@
 import os
 import re
 import shutil
-import cv2
-import numpy as np
-import easyocr
 from datetime import datetime
 import csv
+from correction_rules import CorrectionRuleIndex
 
 # --- CONFIGURATION ---
 SOURCE_DIR = "/Users/alfredlim/Redpower/rename_images/images"
@@ -15,13 +13,28 @@ DEST_DIR   = "/Users/alfredlim/Redpower/rename_images/images_renamed"
 FAILED_DIR = "/Users/alfredlim/Redpower/rename_images/failed"
 LOG_FILE   = "/Users/alfredlim/Redpower/rename_images/success_log.csv"
 ML_TRAINING_DATA = "/Users/alfredlim/Redpower/rename_images/ml_training_data.csv"
+CORRECTION_RULES_FILE = "/Users/alfredlim/Redpower/rename_images/correction_rules.json"
 
-# Initialize EasyOCR reader (once, at startup)
-print("Initializing EasyOCR (may take a few seconds)...")
-easyocr_reader = easyocr.Reader(['en'], gpu=True)  # Set gpu=True if you have CUDA
+# EasyOCR reader, created on first use by get_ocr_reader() (once per process).
+# cv2/easyocr are imported lazily so the extraction functions import instantly.
+easyocr_reader = None
 
 # --- FUNCTIONS ---
 
+def get_ocr_reader(gpu=True):
+    """Return this process's EasyOCR reader, creating it on first use"""
+    global easyocr_reader
+    if easyocr_reader is None:
+        import easyocr
+        print("Initializing EasyOCR (may take a few seconds)...")
+        easyocr_reader = easyocr.Reader(['en'], gpu=gpu)  # Set gpu=True if you have CUDA
+    return easyocr_reader
+
+def load_dependencies():
+    """Warm up the heavy OCR stack up front instead of on the first image"""
+    import cv2
+    get_ocr_reader()
+
 def extract_equipment_type(text):
     """
     Extract equipment type by matching ONLY uppercase standalone abbreviations:
@@ -111,6 +124,7 @@ def clean_road_name(road_text):
     return road
 
 def crop_watermark_precise(image_path):
+    import cv2
     img = cv2.imread(image_path)
     if img is None:
         raise ValueError(f"Cannot load image: {image_path}")
@@ -123,34 +137,18 @@ def crop_watermark_precise(image_path):
     enhanced = clahe.apply(gray)
     return enhanced
 
+_correction_index = None
+
+def get_correction_index():
+    """Correction-rule index, built once per process from the sidecar + success log"""
+    global _correction_index
+    if _correction_index is None:
+        _correction_index = CorrectionRuleIndex(LOG_FILE, CORRECTION_RULES_FILE).load()
+    return _correction_index
+
 def build_correction_rules_from_log():
     """Learn common OCR → correct mappings from success log"""
-    corrections = {}
-    if not os.path.exists(LOG_FILE):
-        return corrections
-    try:
-        with open(LOG_FILE, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                ocr_text = row['ocr_text']
-                correct_block = row['block']
-                correct_road = row['road']
-                block_num = re.sub(r'[A-Za-z]', '', correct_block)
-                if block_num:
-                    corrupted_match = re.search(rf'\b{block_num}[\/\\,\s]?\b', ocr_text)
-                    if corrupted_match:
-                        corrupted = corrupted_match.group().strip()
-                        if corrupted != correct_block:
-                            corrections[corrupted] = correct_block
-                if 'yishun' in correct_road.lower():
-                    yishun_match = re.search(r'\b(Yi[shn]*[ea]?)\b', ocr_text, re.IGNORECASE)
-                    if yishun_match:
-                        bad_yishun = yishun_match.group()
-                        if bad_yishun.lower() != 'yishun':
-                            corrections[bad_yishun] = 'Yishun'
-    except Exception as e:
-        print(f"⚠️ Error reading log: {e}")
-    return corrections
+    return get_correction_index().as_dict()
 
 def log_success(filename, original_ocr, block, road, equipment, date_str):
     """Log successful extraction for rule learning"""
@@ -159,9 +157,20 @@ def log_success(filename, original_ocr, block, road, equipment, date_str):
             writer = csv.writer(f)
             if f.tell() == 0:
                 writer.writerow(['filename', 'ocr_text', 'block', 'road', 'equipment', 'date'])
+            start_offset = f.tell()
             writer.writerow([filename, original_ocr, block, road, equipment, date_str])
+            f.flush()
+            end_offset = f.tell()
     except Exception as e:
         print(f"⚠️ Error writing to log: {e}")
+        return
+
+    # Keep the in-memory correction rules current
+    index = get_correction_index()
+    changed = index.learn(original_ocr, block, road)
+    index.record_append(start_offset, end_offset)
+    if changed:
+        index.save()
 
 def save_training_pair(filename, watermark_ocr, block, road, equipment, date_str):
     """Save (watermark_ocr, block, road) pairs for ML training"""
@@ -178,9 +187,7 @@ def extract_info_from_ocr(ocr_text):
     text = ocr_text.strip()
 
     # Apply learned corrections from past successes
-    correction_rules = build_correction_rules_from_log()
-    for bad, good in correction_rules.items():
-        text = re.sub(re.escape(bad), good, text, flags=re.IGNORECASE)
+    text = get_correction_index().apply(text)
 
     # === Yishun Normalization ===
     text = re.sub(r'[Vv]ishun', 'Yishun', text)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Replay the extractors over logged OCR text, without running OCR.
+Streams the ocr_text / watermark_ocr columns of success_log.csv and
+ml_training_data.csv through extract_ground_truth_from_full_ocr() (which
+includes extract_equipment_type()) and the tiered fast-path check, across
+all cores. Reports accuracy against the logged labels, what changed since
+the previous replay, and rows/sec — so a regex change is a seconds-long check.
+
+Usage: python replay_extraction.py [--workers N] [--show 10] [--no-save]
+"""
+import os
+import csv
+import json
+import time
+import argparse
+import tempfile
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+
+import rename_images
+from rename_images import extract_ground_truth_from_full_ocr, extract_from_watermark
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# (file, text column, block/road/equipment/date label columns)
+SOURCES = [
+    ('success_log.csv', 'ocr_text', ('block', 'road', 'equipment', 'date')),
+    ('ml_training_data.csv', 'watermark_ocr', ('block_label', 'road_label', 'equipment_label', 'date_label')),
+]
+FIELDS = ('block', 'road', 'equipment', 'date')
+CHUNK_ROWS = 512
+
+def use_logs(log_dir):
+    """
+    Point rename_images at --dir's success log and rule sidecar, so the fast-path
+    check learns its correction rules and known roads from the data being
+    replayed. Run in the main process and as each pool worker's initializer.
+    """
+    rename_images.LOG_FILE = os.path.join(log_dir, 'success_log.csv')
+    rename_images.CORRECTION_RULES_FILE = os.path.join(log_dir, 'correction_rules.json')
+
+def replay_texts(texts):
+    """Worker: (block, road, equipment, date, fast path accepted) per text"""
+    out = []
+    for text in texts:
+        block, road, date_str, equipment = extract_ground_truth_from_full_ocr(text)
+        fast = extract_from_watermark(text) is not None
+        out.append((block or '', road or '', equipment or '', date_str or '', fast))
+    return out
+
+def iter_rows(path, text_column, label_columns):
+    """(row index, text, labels) for every logged row, read lazily"""
+    with open(path, 'r', newline='') as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            yield i, row[text_column], tuple(row.get(col) or '' for col in label_columns)
+
+def chunked(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+def replay_source(pool, workers, path, text_column, label_columns):
+    """Returns ({row key: prediction}, {row key: labels})"""
+    predictions, labels = {}, {}
+    name = os.path.basename(path)
+    chunks = chunked(iter_rows(path, text_column, label_columns), CHUNK_ROWS)
+    # Keep a bounded number of chunks in flight so huge logs stream instead of loading at once
+    in_flight = []
+    for chunk in chunks:
+        in_flight.append((chunk, pool.submit(replay_texts, [text for _, text, _ in chunk])))
+        if len(in_flight) >= 4 * workers:
+            _collect(in_flight.pop(0), name, predictions, labels)
+    for item in in_flight:
+        _collect(item, name, predictions, labels)
+    return predictions, labels
+
+def _collect(item, name, predictions, labels):
+    chunk, future = item
+    for (i, _, row_labels), prediction in zip(chunk, future.result()):
+        key = f"{name}:{i}"
+        predictions[key] = prediction
+        labels[key] = row_labels
+
+def correct_fields(prediction, row_labels):
+    return {field: prediction[j] == row_labels[j] for j, field in enumerate(FIELDS)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay extraction over logged OCR text")
+    parser.add_argument('--dir', default=HERE, help="Folder holding success_log.csv / ml_training_data.csv")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--state', default=os.path.join(tempfile.gettempdir(), 'rename_images_replay_last.json'),
+                        help="Predictions of the previous replay, for the diff")
+    parser.add_argument('--show', type=int, default=5, help="Changed rows to print per direction")
+    parser.add_argument('--no-save', action='store_true', help="Don't overwrite --state with this run")
+    args = parser.parse_args()
+
+    previous = None
+    if os.path.exists(args.state):
+        with open(args.state, 'r') as f:
+            previous = json.load(f)
+
+    predictions, labels = {}, {}
+    start = time.perf_counter()
+    use_logs(args.dir)
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=use_logs, initargs=(args.dir,)) as pool:
+        for filename, text_column, label_columns in SOURCES:
+            path = os.path.join(args.dir, filename)
+            if not os.path.exists(path):
+                print(f"⚠️ Skipping missing {path}")
+                continue
+            source_predictions, source_labels = replay_source(pool, args.workers, path, text_column, label_columns)
+            predictions.update(source_predictions)
+            labels.update(source_labels)
+    elapsed = time.perf_counter() - start
+    if not predictions:
+        print("❌ Nothing to replay")
+        raise SystemExit(1)
+
+    print(f"{'Source':22s} {'rows':>6s} {'block':>7s} {'road':>7s} {'blk+road':>9s} {'equip':>7s} {'date':>7s}")
+    for filename, _, _ in SOURCES:
+        keys = [k for k in predictions if k.startswith(filename + ':')]
+        if not keys:
+            continue
+        scores = [correct_fields(predictions[k], labels[k]) for k in keys]
+        pct = lambda n: f"{100 * n / len(keys):6.1f}%"
+        print(f"{filename:22s} {len(keys):6d} "
+              f"{pct(sum(s['block'] for s in scores)):>7s} {pct(sum(s['road'] for s in scores)):>7s} "
+              f"{pct(sum(s['block'] and s['road'] for s in scores)):>9s} "
+              f"{pct(sum(s['equipment'] for s in scores)):>7s} {pct(sum(s['date'] for s in scores)):>7s}")
+
+    fast = [k for k, p in predictions.items() if p[4]]
+    fast_ok = sum(1 for k in fast if predictions[k][:2] == labels[k][:2])
+    print(f"Tiered fast path: accepts {100 * len(fast) / len(predictions):.1f}% of rows, "
+          f"block+road right on {100 * fast_ok / max(1, len(fast)):.1f}% of those")
+    print(f"Throughput: {len(predictions) / elapsed:,.0f} rows/sec ({len(predictions)} rows, "
+          f"{args.workers} workers, {elapsed:.2f}s)")
+
+    if previous:
+        fixed, broken, changed = [], [], 0
+        for key, prediction in predictions.items():
+            before = previous.get(key)
+            if before is None or list(before) == list(prediction):
+                continue
+            changed += 1
+            was = correct_fields(before, labels[key])
+            now = correct_fields(prediction, labels[key])
+            for field in FIELDS:
+                if now[field] and not was[field]:
+                    fixed.append((key, field, before, prediction))
+                elif was[field] and not now[field]:
+                    broken.append((key, field, before, prediction))
+        print(f"\nVs previous replay: {changed} rows changed, {len(fixed)} field(s) fixed, {len(broken)} broken")
+        for title, items in (("✅ Fixed", fixed), ("❌ Broken", broken)):
+            for key, field, before, prediction in items[:args.show]:
+                j = FIELDS.index(field)
+                print(f"   {title} {key} {field}: {before[j]!r} → {prediction[j]!r} (label {labels[key][j]!r})")
+    else:
+        print("\n(No previous replay to diff against)")
+
+    if not args.no_save:
+        with open(args.state, 'w') as f:
+            json.dump(predictions, f, separators=(',', ':'))
@@ -0,0 +1,140 @@
+# results_sink.py — buffered CSV appends backed by an fsync'd journal
+
+import os
+import csv
+import glob
+import json
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single writer assumed
+    fcntl = None
+
+def _lock(f, blocking=True):
+    """Exclusive advisory lock on an open file; False if non-blocking and already held"""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        return True
+    except BlockingIOError:
+        return False
+
+class ResultsSink:
+    """
+    Buffers rows for several CSV files and appends them in batches.
+    - append() writes the row to this process's journal (fsync'd) before
+      buffering it, so an acknowledged row survives a crash.
+    - Buffered rows are written once max_rows are pending or max_seconds
+      have passed since the last flush, and on close().
+    - Each CSV is locked while it is appended to, and each process has its
+      own journal, so several processes can share one set of CSV files.
+    - recover() replays journals left behind by processes that died.
+    on_flush(path, start_offset, end_offset) is called after appended rows land
+    in a CSV (not for recovered rows, which this process never saw).
+    """
+
+    def __init__(self, journal_dir, max_rows=100, max_seconds=30.0, on_flush=None):
+        self.journal_dir = journal_dir
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.on_flush = on_flush
+        self.pending = {}   # csv path → (header, [rows])
+        self.count = 0
+        self.last_flush = time.monotonic()
+        self.journal_path = os.path.join(journal_dir, f"results_sink.{os.getpid()}.journal")
+        self.journal = None
+
+    def _open_journal(self):
+        os.makedirs(self.journal_dir, exist_ok=True)
+        self.journal = open(self.journal_path, 'a', encoding='utf-8')
+        _lock(self.journal)  # Held for our lifetime: tells recover() we're alive
+
+    def _journal_write(self, record):
+        if self.journal is None:
+            self._open_journal()
+        self.journal.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+
+    def append(self, path, header, row):
+        self._journal_write({'path': path, 'header': header, 'row': row})
+        self.pending.setdefault(path, (header, []))[1].append(row)
+        self.count += 1
+        self.flush_if_due()
+
+    def flush_if_due(self):
+        if self.count >= self.max_rows or (self.count and time.monotonic() - self.last_flush >= self.max_seconds):
+            self.flush()
+
+    def flush(self):
+        if self.count:
+            for path, (header, rows) in self.pending.items():
+                self._write_rows(path, header, rows)
+                self._journal_write({'done': path})
+            self.pending = {}
+            self.count = 0
+            self.journal.truncate(0)
+            os.fsync(self.journal.fileno())
+        self.last_flush = time.monotonic()
+
+    def _write_rows(self, path, header, rows, notify=True, truncate_to=None):
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            _lock(f)
+            writer = csv.writer(f)
+            f.seek(0, os.SEEK_END)
+            if truncate_to is not None and f.tell() > truncate_to:
+                f.truncate(truncate_to)  # Undo the rows a crashed flush half-wrote
+                f.seek(0, os.SEEK_END)
+            start_offset = f.tell()
+            if notify:
+                # Size taken under the lock (no other writer can move it): a crash
+                # mid-write is undone by truncating back to it
+                self._journal_write({'flush': {path: start_offset}})
+            if start_offset == 0:
+                writer.writerow(header)
+            writer.writerows(rows)
+            f.flush()
+            os.fsync(f.fileno())
+            end_offset = f.tell()
+        if notify and self.on_flush:
+            self.on_flush(path, start_offset, end_offset)
+
+    def recover(self):
+        """Write out rows from journals whose process is gone; returns the number of rows"""
+        recovered = 0
+        for journal_path in glob.glob(os.path.join(self.journal_dir, "results_sink.*.journal")):
+            if journal_path == self.journal_path and self.journal is not None:
+                continue
+            with open(journal_path, 'r+', encoding='utf-8') as f:
+                if not _lock(f, blocking=False):
+                    continue  # Another live process owns it
+                pending, sizes, done = {}, {}, set()
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # Torn last line: that append was never acknowledged
+                    if 'flush' in record:
+                        sizes.update(record['flush'])
+                    elif 'done' in record:
+                        done.add(record['done'])
+                    else:
+                        pending.setdefault(record['path'], (record['header'], []))[1].append(record['row'])
+                # Undo the CSV a crashed flush was in the middle of (under its
+                # lock), then rewrite everything that flush hadn't finished
+                for path, (header, rows) in pending.items():
+                    if path in done:
+                        continue
+                    self._write_rows(path, header, rows, notify=False, truncate_to=sizes.get(path))
+                    recovered += len(rows)
+            os.remove(journal_path)
+        return recovered
+
+    def close(self):
+        self.flush()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+            os.remove(self.journal_path)
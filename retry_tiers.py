@@ -0,0 +1,65 @@
+# retry_tiers.py — heavier watermark preprocessing, tried only on photos that failed extraction
+
+# Each tier turns the decoded colour frame into one image to OCR, ordered
+# from cheap to expensive; rename_images.retry_extraction() stops at the
+# first one whose text extracts a valid block and road. `roi` is the camera's
+# learned watermark crop (roi_profiles), or None for DEFAULT_ROI.
+
+from roi_profiles import DEFAULT_ROI, roi_pixels
+
+def _band(img, roi=None):
+    """The watermark band (same place as the first pass)"""
+    x0, y0, x1, y1 = roi_pixels(roi or DEFAULT_ROI, img.shape)
+    return img[y0:y1, x0:x1]
+
+def _gray_band(img, roi=None):
+    import cv2
+    return cv2.cvtColor(_band(img, roi), cv2.COLOR_BGR2GRAY)
+
+def _clahe(gray, clip, tiles):
+    import cv2
+    return cv2.createCLAHE(clipLimit=clip, tileGridSize=(tiles, tiles)).apply(gray)
+
+def clahe_strong(img, roi=None):
+    """Harder contrast stretch in smaller tiles: faint watermarks on bright walls"""
+    return _clahe(_gray_band(img, roi), 6.0, 4)
+
+def clahe_soft(img, roi=None):
+    """Gentler, wider tiles: blown-out or noisy watermarks the default CLAHE over-sharpens"""
+    return _clahe(_gray_band(img, roi), 1.5, 16)
+
+def binarize(img, roi=None):
+    """Otsu threshold after a light blur: separates the white text from busy backgrounds"""
+    import cv2
+    gray = cv2.GaussianBlur(_gray_band(img, roi), (3, 3), 0)
+    return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+def upscale(img, roi=None):
+    """2x cubic upscale of the band: small text on low-resolution forwards"""
+    import cv2
+    gray = _clahe(_gray_band(img, roi), 3.0, 8)
+    return cv2.resize(gray, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+
+def _rotated(img, code):
+    import cv2
+    # The learned crop describes the photo as taken, not turned: look in the default band
+    return _clahe(_gray_band(cv2.rotate(img, code)), 3.0, 8)
+
+def rotate_cw(img, roi=None):
+    """Sideways photo (watermark along the left edge): rotate clockwise, then crop"""
+    import cv2
+    return _rotated(img, cv2.ROTATE_90_CLOCKWISE)
+
+def rotate_ccw(img, roi=None):
+    """Sideways photo the other way round"""
+    import cv2
+    return _rotated(img, cv2.ROTATE_90_COUNTERCLOCKWISE)
+
+RETRY_TIERS = (
+    ('clahe-strong', clahe_strong),
+    ('clahe-soft', clahe_soft),
+    ('binarize', binarize),
+    ('upscale', upscale),
+    ('rotate-cw', rotate_cw),
+    ('rotate-ccw', rotate_ccw),
+)
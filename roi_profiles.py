@@ -0,0 +1,168 @@
+# roi_profiles.py — learned watermark crop per camera (frame size + orientation)
+
+import time
+import sqlite3
+
+# Where the watermark is looked for until a camera has a profile: bottom-left 40% x 30%
+DEFAULT_ROI = (0.0, 0.70, 0.40, 1.0)  # (x0, y0, x1, y1) as fractions of the frame
+GRID = 100  # ROIs are rounded outward to 1%, so a crop moves less before it freezes
+
+def profile_key(frame_shape, reduction=1):
+    """'landscape:4000x3000' — frames decoded at 1/reduction are keyed by their full size"""
+    h, w = frame_shape[:2]
+    w, h = w * reduction, h * reduction
+    return f"{'portrait' if h > w else 'landscape'}:{w}x{h}"
+
+def roi_pixels(roi, frame_shape):
+    """(x0, y0, x1, y1) pixel bounds of a fractional ROI"""
+    h, w = frame_shape[:2]
+    x0, y0, x1, y1 = roi
+    return int(x0 * w), int(y0 * h), max(int(x0 * w) + 1, int(x1 * w)), max(int(y0 * h) + 1, int(y1 * h))
+
+def roi_params(roi):
+    """Cache-key fragment describing the crop"""
+    return "roi=" + ",".join(f"{v:.2f}" for v in roi)
+
+def text_envelope(boxes, roi, frame_shape, scale=1.0, min_confidence=0.2):
+    """
+    Bounding box (frame fractions) of readtext(detail=1) boxes found in a crop
+    of `roi`, plus which crop edges it touches — text touching an edge that
+    isn't the frame's own edge was probably cut off. Boxes are in crop pixels
+    times `scale` (the batched OCR resizes crops). Returns None without text.
+    """
+    points = [pt for box, text, confidence in boxes if confidence >= min_confidence and text.strip()
+              for pt in box]
+    if not points:
+        return None
+    h, w = frame_shape[:2]
+    cx0, cy0, cx1, cy1 = roi_pixels(roi, frame_shape)
+    xs = [cx0 + pt[0] / scale for pt in points]
+    ys = [cy0 + pt[1] / scale for pt in points]
+    x0, y0, x1, y1 = max(min(xs), 0), max(min(ys), 0), min(max(xs), w), min(max(ys), h)
+    slack = 2 / scale + 1  # px
+    clipped = ''.join(side for side, touches in (
+        ('l', cx0 > 0 and x0 - cx0 <= slack), ('t', cy0 > 0 and y0 - cy0 <= slack),
+        ('r', cx1 < w and cx1 - x1 <= slack), ('b', cy1 < h and cy1 - y1 <= slack),
+    ) if touches)
+    return (x0 / w, y0 / h, x1 / w, y1 / h, clipped)
+
+class ROIProfiles:
+    """
+    Where the watermark sits, per camera profile (see profile_key).
+    Successful runs record the envelope of the watermark's text boxes; once a
+    profile has min_samples of them, crops use their envelope (trimmed of the
+    outermost `trim` share of samples, plus `margin`) instead of DEFAULT_ROI.
+    Until then, and whenever recent samples were cut off at a crop edge, the
+    crop is grown by `grow` on that side so the next photo shows all of it.
+    Once a profile's crop has converged (min_samples samples, none of the
+    recent ones cut off) it is frozen: stored as-is and returned from then
+    on, so the crop (and with it the OCR cache key) stops moving as more
+    samples arrive. A frozen crop only changes if text is cut off at one of
+    its edges, which grows it on that side once.
+    Stored in SQLite (shared by all workers); other processes' samples and
+    frozen crops are picked up on the next lookup.
+    """
+
+    def __init__(self, db_path, min_samples=5, max_samples=50, margin=0.03, trim=0.05, grow=0.15):
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.margin = margin
+        self.trim = trim
+        self.grow = grow
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS roi_samples (
+                id INTEGER PRIMARY KEY,
+                profile TEXT NOT NULL,
+                x0 REAL NOT NULL, y0 REAL NOT NULL, x1 REAL NOT NULL, y1 REAL NOT NULL,
+                clipped TEXT NOT NULL,
+                added REAL NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS roi_frozen (
+                profile TEXT PRIMARY KEY,
+                x0 REAL NOT NULL, y0 REAL NOT NULL, x1 REAL NOT NULL, y1 REAL NOT NULL,
+                frozen REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+        self.samples = {}  # profile → [(x0, y0, x1, y1, clipped)], oldest first
+        self.frozen = {}   # profile → (x0, y0, x1, y1)
+        self.last_id = 0
+
+    def _refresh(self):
+        rows = self.conn.execute(
+            "SELECT id, profile, x0, y0, x1, y1, clipped FROM roi_samples WHERE id > ? ORDER BY id", (self.last_id,)
+        ).fetchall()
+        for row_id, profile, *sample in rows:
+            kept = self.samples.setdefault(profile, [])
+            kept.append(tuple(sample))
+            del kept[:-self.max_samples]
+            self.last_id = row_id
+        self.frozen = {profile: tuple(roi) for profile, *roi in
+                       self.conn.execute("SELECT profile, x0, y0, x1, y1 FROM roi_frozen")}
+
+    def _freeze(self, profile, roi, replace=False):
+        """Store the crop for good; the first process to freeze a profile wins unless replacing"""
+        self.conn.execute(
+            f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO roi_frozen VALUES (?, ?, ?, ?, ?, ?)",
+            (profile, *roi, time.time()),
+        )
+        self.conn.commit()
+        self.frozen[profile] = tuple(self.conn.execute(
+            "SELECT x0, y0, x1, y1 FROM roi_frozen WHERE profile = ?", (profile,)).fetchone())
+
+    @staticmethod
+    def _snap(bounds):
+        """Round outward to the GRID and clamp to the frame"""
+        x0, y0 = (max(0.0, int(v * GRID) / GRID) for v in bounds[:2])
+        x1, y1 = (min(1.0, -int(-v * GRID) / GRID) for v in bounds[2:])
+        return (x0, y0, x1, y1)
+
+    def _grown(self, bounds, samples):
+        """Bounds pushed out past every edge where one of `samples` was cut off"""
+        bounds = list(bounds)
+        for x0, y0, x1, y1, clipped in samples:
+            for side in clipped:
+                i = 'ltrb'.index(side)
+                edge = (x0, y0, x1, y1)[i]
+                bounds[i] = min(bounds[i], edge - self.grow) if i < 2 else max(bounds[i], edge + self.grow)
+        return bounds
+
+    def roi(self, profile):
+        """Crop for this profile: frozen or learned if ready, else DEFAULT_ROI (grown where text was cut off)"""
+        self._refresh()
+        if profile in self.frozen:
+            return self.frozen[profile]
+        samples = self.samples.get(profile, [])
+        if len(samples) >= self.min_samples:
+            n = len(samples)
+            cut = int(n * self.trim)
+            pick = lambda i, reverse: sorted(s[i] for s in samples)[n - 1 - cut if reverse else cut]
+            bounds = [pick(0, False) - self.margin, pick(1, False) - self.margin,
+                      pick(2, True) + self.margin, pick(3, True) + self.margin]
+        else:
+            bounds = list(DEFAULT_ROI)
+        recent = samples[-self.min_samples:]
+        roi = self._snap(self._grown(bounds, recent))
+        if len(samples) >= self.min_samples and not any(clipped for *_, clipped in recent):
+            self._freeze(profile, roi)
+            return self.frozen[profile]
+        return roi
+
+    def observe(self, profile, envelope):
+        """Record the text envelope (from text_envelope) of a successful run"""
+        self.conn.execute(
+            "INSERT INTO roi_samples (profile, x0, y0, x1, y1, clipped, added) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (profile, *envelope, time.time()),
+        )
+        self.conn.commit()
+        frozen = self.frozen.get(profile)
+        if frozen and envelope[4]:
+            # Text cut off by the frozen crop: widen it on that side (one cache-key change)
+            self._freeze(profile, self._snap(self._grown(frozen, [envelope])), replace=True)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,96 @@
+# run_manifest.py — which source photos are already done, so interrupted runs can resume
+
+import os
+import json
+import time
+import sqlite3
+
+# Lifecycle of a row: 'logging' (CSV rows not yet journaled) → 'placing'
+# (file move/link not yet done) → 'done'
+SKIP_OUTCOMES = ('success', 'failed')
+
+class RunManifest:
+    """
+    SQLite record of every source photo handled: its name, size/mtime, content
+    hash, outcome and output path, plus the analyze result needed to finish
+    the job if the run dies half-way through logging or moving it.
+    Rows are keyed by source filename; a file still in the source folder
+    counts as done only while its size and mtime match the ones recorded by
+    begin(), so a replaced photo is processed again.
+    """
+
+    def __init__(self, db_path, skip_outcomes=SKIP_OUTCOMES):
+        self.db_path = db_path
+        self.skip_outcomes = tuple(skip_outcomes)
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS processed (
+                src_name TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT,
+                outcome TEXT NOT NULL,
+                output_path TEXT NOT NULL,
+                state TEXT NOT NULL,
+                result TEXT NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_content_hash ON processed(content_hash)")
+        self.conn.commit()
+        self._done = None
+
+    def _load_done(self):
+        """name → (size, mtime_ns) for finished rows, read once so lookups are O(1)"""
+        self._done = {
+            name: (size, mtime_ns) for name, size, mtime_ns, outcome in self.conn.execute(
+                "SELECT src_name, size, mtime_ns, outcome FROM processed WHERE state = 'done'")
+            if outcome in self.skip_outcomes
+        }
+
+    def is_done(self, src_path):
+        """True if src_path, unchanged, was already finished with one of skip_outcomes"""
+        if self._done is None:
+            self._load_done()
+        signature = self._done.get(os.path.basename(src_path))
+        if signature is None:
+            return False
+        try:
+            st = os.stat(src_path)
+        except FileNotFoundError:
+            return True  # Moved away by the run that finished it
+        return (st.st_size, st.st_mtime_ns) == signature
+
+    def begin(self, result, outcome, output_path, state, stat):
+        """Record the intent to finish `result` (stat = the photo's (size, mtime_ns) as the result is applied)"""
+        size, mtime_ns = stat
+        self.conn.execute(
+            "INSERT OR REPLACE INTO processed VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (os.path.basename(result['src_path']), size, mtime_ns, result.get('content_hash'), outcome,
+             output_path, state, json.dumps(result, ensure_ascii=False), time.time()),
+        )
+        self.conn.commit()
+        if self._done is not None:
+            self._done.pop(os.path.basename(result['src_path']), None)
+
+    def set_state(self, src_path, state):
+        name = os.path.basename(src_path)
+        self.conn.execute("UPDATE processed SET state = ?, updated = ? WHERE src_name = ?",
+                          (state, time.time(), name))
+        self.conn.commit()
+        if state == 'done' and self._done is not None:
+            row = self.conn.execute("SELECT size, mtime_ns, outcome FROM processed WHERE src_name = ?",
+                                    (name,)).fetchone()
+            if row[2] in self.skip_outcomes:
+                self._done[name] = (row[0], row[1])
+
+    def unfinished(self):
+        """(result, outcome, output_path, state) for photos a previous run didn't finish"""
+        rows = self.conn.execute(
+            "SELECT result, outcome, output_path, state FROM processed WHERE state != 'done'"
+        ).fetchall()
+        return [(json.loads(result), outcome, output_path, state) for result, outcome, output_path, state in rows]
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,144 @@
+# run_metrics.py — per-stage timings and the end-of-run report
+
+import json
+import time
+
+class StageTimer:
+    """
+    Seconds spent per pipeline stage for one image.
+    lap(stage) charges the time since the previous lap to `stage`; a couple of
+    perf_counter() calls per stage, so it stays on even when nobody reads it.
+    """
+
+    def __init__(self, timings=None):
+        self.timings = dict(timings) if timings else {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + now - self._last
+        self._last = now
+
+def percentile(values, q):
+    """Nearest-rank percentile of an unsorted list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+class RunMetrics:
+    """
+    Aggregates analyze_image() results for one run: outcome and failure-reason
+    counts, full-image OCR passes avoided (and why the rest escalated),
+    what the retry tiers cost and rescued, per-stage latency distributions
+    and throughput. Optionally prints
+    a progress line (with ETA when the total is known) every progress_every seconds.
+    """
+
+    def __init__(self, total=None, progress_every=None):
+        self.total = total
+        self.progress_every = progress_every
+        self.started = time.perf_counter()
+        self._last_progress = self.started
+        self.done = 0
+        self.skipped = 0
+        self.outcomes = {}
+        self.failure_reasons = {}
+        self.tiers = {}
+        self.avoided = {}      # why full-image OCR was skipped → images
+        self.escalations = {}  # why the watermark read wasn't enough → images
+        self.retried = 0       # images the retry tiers ran on
+        self.retry_tiers = 0   # retry tiers tried across them
+        self.rescued = 0       # ...and how many of those images they rescued
+        self.stages = {}     # stage → [seconds per image]
+        self.latencies = []  # analyze_image() wall time per image
+
+    def record(self, result):
+        self.done += 1
+        status = result['status']
+        self.outcomes[status] = self.outcomes.get(status, 0) + 1
+        if status != 'success':
+            reason = result.get('reason', status)
+            self.failure_reasons[reason] = self.failure_reasons.get(reason, 0) + 1
+        if result.get('tier'):
+            self.tiers[result['tier']] = self.tiers.get(result['tier'], 0) + 1
+        avoided = result.get('early_exit') or ('duplicate' if result.get('tier') == 'duplicate' else None)
+        if avoided:
+            self.avoided[avoided] = self.avoided.get(avoided, 0) + 1
+        if result.get('escalation'):
+            self.escalations[result['escalation']] = self.escalations.get(result['escalation'], 0) + 1
+        if result.get('retries'):
+            self.retried += 1
+            self.retry_tiers += result['retries']
+            self.rescued += status == 'success'
+        for stage, seconds in result.get('timings', {}).items():
+            self.stages.setdefault(stage, []).append(seconds)
+        if 'elapsed' in result:
+            self.latencies.append(result['elapsed'])
+        if self.progress_every is not None:
+            now = time.perf_counter()
+            if now - self._last_progress >= self.progress_every:
+                self._last_progress = now
+                print(self.progress_line(now))
+
+    def progress_line(self, now=None):
+        elapsed = (now or time.perf_counter()) - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        line = f"⏱️  {self.done}" + (f"/{self.total}" if self.total else "") + f" images  {rate:.2f} img/s"
+        if self.total and rate > 0:
+            remaining = (self.total - self.done) / rate
+            line += f"  ETA {int(remaining // 60)}m{int(remaining % 60):02d}s"
+        failed = self.done - self.outcomes.get('success', 0)
+        return line + f"  ({failed} failed)"
+
+    def summary(self):
+        wall = time.perf_counter() - self.started
+        def distribution(values):
+            return {
+                'count': len(values),
+                'mean_ms': 1000 * sum(values) / len(values),
+                'p50_ms': 1000 * percentile(values, 50),
+                'p95_ms': 1000 * percentile(values, 95),
+                'p99_ms': 1000 * percentile(values, 99),
+                'total_s': sum(values),
+            }
+        return {
+            'images': self.done,
+            'skipped': self.skipped,
+            'wall_s': wall,
+            'images_per_sec': self.done / wall if wall > 0 else 0.0,
+            'outcomes': self.outcomes,
+            'failure_reasons': self.failure_reasons,
+            'tiers': self.tiers,
+            'full_ocr_avoided': self.avoided,
+            'escalations': self.escalations,
+            'retries': {'images': self.retried, 'tiers_tried': self.retry_tiers, 'rescued': self.rescued},
+            'latency': distribution(self.latencies) if self.latencies else None,
+            'stages': {stage: distribution(values) for stage, values in self.stages.items()},
+        }
+
+    def report(self, json_path=None):
+        """Print the summary and optionally write it as JSON"""
+        summary = self.summary()
+        print(f"\n📈 Run metrics: {summary['images']} images in {summary['wall_s']:.1f}s "
+              f"({summary['images_per_sec']:.2f} img/s), {summary['skipped']} skipped")
+        for status, count in sorted(summary['outcomes'].items()):
+            print(f"   {status:8s} {count}")
+        for reason, count in sorted(summary['failure_reasons'].items(), key=lambda kv: -kv[1]):
+            print(f"   ↳ {reason}: {count}")
+        if self.avoided or self.escalations:
+            breakdown = lambda counts: ", ".join(f"{reason} {n}" for reason, n in
+                                                 sorted(counts.items(), key=lambda kv: -kv[1]))
+            print(f"   Full-image OCR avoided on {sum(self.avoided.values())} image(s)"
+                  + (f" ({breakdown(self.avoided)})" if self.avoided else ""))
+            if self.escalations:
+                print(f"   ↳ escalated {sum(self.escalations.values())}: {breakdown(self.escalations)}")
+        if self.retried:
+            print(f"   Retry tiers ran on {self.retried} image(s) ({self.retry_tiers} tier(s) tried), "
+                  f"rescued {self.rescued}")
+        for stage, s in summary['stages'].items():
+            print(f"   {stage:14s} p50 {s['p50_ms']:8.1f} ms  p95 {s['p95_ms']:8.1f}  p99 {s['p99_ms']:8.1f}  "
+                  f"total {s['total_s']:7.1f}s")
+        if json_path:
+            with open(json_path, 'w') as f:
+                json.dump(summary, f, indent=2)
+            print(f"   Written to '{json_path}'")
+        return summary
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Accuracy/latency sweep for the full-image OCR downscale (FULL_OCR_MAX_SIDE).
+Takes a labelled sample from success_log.csv, finds each photo in the renamed
+output folder, runs full-image OCR at several max-side resolutions and picks
+the smallest one that keeps block/road accuracy.
+
+Usage: python sweep_resolution.py [--sample 100] [--sides 2560,2048,1600,1280,1024,800]
+"""
+import os
+import csv
+import json
+import time
+import random
+import argparse
+
+from rename_images import (
+    LOG_FILE, DEST_DIR, load_image, ocr_full_image, get_ocr_reader,
+    extract_ground_truth_from_full_ocr,
+)
+
+def find_renamed_images(dest_dir):
+    """original filename → path, from '<equipment>_<block>_<road>_<date>_<original>' names"""
+    by_original = {}
+    for name in os.listdir(dest_dir):
+        parts = name.split('_')
+        # Roads contain underscores too, so index every suffix and let the log's filenames pick
+        for i in range(1, len(parts)):
+            by_original.setdefault('_'.join(parts[i:]), os.path.join(dest_dir, name))
+    return by_original
+
+def load_sample(log_file, dest_dir, size, seed):
+    with open(log_file, 'r') as f:
+        rows = list(csv.DictReader(f))
+    renamed = find_renamed_images(dest_dir)
+    labelled = [(renamed[row['filename']], row) for row in rows if row['filename'] in renamed]
+    random.Random(seed).shuffle(labelled)
+    return labelled[:size]
+
+def evaluate(sample, images, max_side):
+    correct = 0
+    elapsed = 0.0
+    for (path, row), img in zip(sample, images):
+        start = time.perf_counter()
+        full_ocr = " ".join(ocr_full_image(img, max_side))
+        elapsed += time.perf_counter() - start
+        block, road, _, _ = extract_ground_truth_from_full_ocr(full_ocr)
+        if block == row['block'] and road == row['road']:
+            correct += 1
+    return correct / len(sample), elapsed / len(sample)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pick FULL_OCR_MAX_SIDE from measured accuracy/latency")
+    parser.add_argument('--log', default=LOG_FILE)
+    parser.add_argument('--images', default=DEST_DIR, help="Folder of renamed photos")
+    parser.add_argument('--sample', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sides', default="2560,2048,1600,1280,1024,800")
+    parser.add_argument('--tolerance', type=float, default=0.0,
+                        help="Accuracy drop (fraction) allowed vs full resolution")
+    parser.add_argument('--json', help="Also write the sweep results here")
+    parser.add_argument('--cpu', action='store_true')
+    args = parser.parse_args()
+
+    sample = load_sample(args.log, args.images, args.sample, args.seed)
+    if not sample:
+        print(f"❌ No logged photos found in '{args.images}'")
+        raise SystemExit(1)
+    print(f"Sample: {len(sample)} labelled photos")
+
+    get_ocr_reader(gpu=not args.cpu)
+    images = [load_image(path) for path, _ in sample]
+
+    sides = [None] + sorted((int(s) for s in args.sides.split(',')), reverse=True)
+    results = []
+    for max_side in sides:
+        accuracy, latency = evaluate(sample, images, max_side)
+        results.append({'max_side': max_side, 'accuracy': accuracy, 'seconds_per_image': latency})
+        label = "full res" if max_side is None else f"{max_side}px"
+        print(f"{label:>9s}: block+road accuracy {100 * accuracy:5.1f}%  {latency:6.2f}s/image")
+
+    baseline = results[0]
+    keeps_accuracy = [r for r in results[1:] if r['accuracy'] >= baseline['accuracy'] - args.tolerance]
+    best = min(keeps_accuracy, key=lambda r: r['max_side']) if keeps_accuracy else baseline
+    if best is baseline:
+        print("\n⚠️  No downscale keeps accuracy; leave FULL_OCR_MAX_SIDE = None")
+    else:
+        speedup = baseline['seconds_per_image'] / best['seconds_per_image']
+        print(f"\n✅ Smallest resolution that keeps accuracy: FULL_OCR_MAX_SIDE = {best['max_side']} "
+              f"({speedup:.1f}x faster full-image OCR)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'sample': len(sample), 'results': results, 'recommended': best['max_side']}, f, indent=2)
@@ -4,6 +4,24 @@ Test script to verify equipment detection improvements
 """
 import re
 
+# OCR typo → correct word, applied as whole words
+OCR_TYPOS = {
+    'purnp': 'pump',          # OCR: purnp -> pump
+    'pumo': 'pump',           # OCR: pumo -> pump
+    'purnpo': 'pump',         # OCR: purnpo -> pump
+    'puypno': 'pump',         # OCR: puypno -> pump (from log)
+    'transier': 'transfer',   # OCR: transier -> transfer
+    'transter': 'transfer',   # OCR: transter -> transfer
+    'boosier': 'booster',     # OCR: boosier -> booster
+    'boster': 'booster',      # OCR: boster -> booster
+    'ruy': 'run',             # OCR: ruy -> run
+    'ru': 'run',              # OCR: ru -> run
+    'jrip': 'trip',           # OCR: jrip -> trip
+    'lught': 'light',         # OCR: lught -> light
+    'lughi': 'light',         # OCR: lughi -> light
+}
+OCR_TYPO_RE = re.compile(r'\b(?:' + '|'.join(OCR_TYPOS) + r')\b')
+
 def extract_equipment_type(text):
     """
     Equipment detection with priority to avoid false positives.
@@ -13,23 +31,8 @@ def extract_equipment_type(text):
     t = text.lower().strip()
     
     # === PREPROCESSING: Handle common OCR errors ===
-    # Fix common character substitutions that affect pump detection
-    t_cleaned = t
-    t_cleaned = re.sub(r'\bpurnp\b', 'pump', t_cleaned)  # OCR: purnp -> pump
-    t_cleaned = re.sub(r'\bpumo\b', 'pump', t_cleaned)   # OCR: pumo -> pump
-    t_cleaned = re.sub(r'\bpurnpo\b', 'pump', t_cleaned) # OCR: purnpo -> pump
-    t_cleaned = re.sub(r'\bpuypno\b', 'pump', t_cleaned) # OCR: puypno -> pump (from log)
-    t_cleaned = re.sub(r'\btransier\b', 'transfer', t_cleaned)  # OCR: transier -> transfer
-    t_cleaned = re.sub(r'\btranster\b', 'transfer', t_cleaned)  # OCR: transter -> transfer
-    t_cleaned = re.sub(r'\bboosier\b', 'booster', t_cleaned)    # OCR: boosier -> booster
-    t_cleaned = re.sub(r'\bboster\b', 'booster', t_cleaned)     # OCR: boster -> booster
-    t_cleaned = re.sub(r'\bstart\b', 'start', t_cleaned)        # Normalize
-    t_cleaned = re.sub(r'\bruy\b', 'run', t_cleaned)            # OCR: ruy -> run
-    t_cleaned = re.sub(r'\bru\b', 'run', t_cleaned)             # OCR: ru -> run
-    t_cleaned = re.sub(r'\bjrip\b', 'trip', t_cleaned)          # OCR: jrip -> trip
-    t_cleaned = re.sub(r'\blught\b', 'light', t_cleaned)        # OCR: lught -> light
-    t_cleaned = re.sub(r'\blughi\b', 'light', t_cleaned)        # OCR: lughi -> light
-    t_cleaned = re.sub(r'\bhrm\b', 'hrm', t_cleaned)            # Normalize HRM
+    # Fix common character substitutions that affect pump detection (one pass)
+    t_cleaned = OCR_TYPO_RE.sub(lambda m: OCR_TYPOS[m.group()], t)
 
     # === STEP 1: Check for TRANSFER PUMP FIRST (highest priority) ===
     # Pattern 1: Look for "TP" label followed by pump-related text
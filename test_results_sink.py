@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test script: ResultsSink.recover() after a crash, from journals left behind
+by a dead process (never this one's), without duplicate CSV rows
+"""
+import os
+import csv
+import json
+import tempfile
+
+from results_sink import ResultsSink
+
+HEADER = ['filename', 'block']
+DEAD_PID = 999999999  # Journal name of a process that no longer exists
+
+def journal_lines(path, rows, flushed_size=None, done=False):
+    """The journal a sink writes for `rows` of one CSV, as far as its process got"""
+    lines = [json.dumps({'path': path, 'header': HEADER, 'row': row}) for row in rows]
+    if flushed_size is not None:
+        lines.append(json.dumps({'flush': {path: flushed_size}}))
+    if done:
+        lines.append(json.dumps({'done': path}))
+    return lines
+
+def run_case(title, existing_rows, journal, csv_tail='', torn_tail=''):
+    """Recover one crashed journal into a CSV already holding existing_rows; returns the CSV's data rows"""
+    tmp = tempfile.mkdtemp()
+    journal_dir = os.path.join(tmp, 'journal')
+    os.makedirs(journal_dir)
+    path = os.path.join(tmp, 'success_log.csv')
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(existing_rows)
+    size = os.path.getsize(path)
+    with open(path, 'a') as f:
+        f.write(csv_tail)  # Half-written rows of the flush that crashed
+    with open(os.path.join(journal_dir, f"results_sink.{DEAD_PID}.journal"), 'w') as f:
+        f.write(''.join(line + '\n' for line in journal(path, size)) + torn_tail)
+
+    sink = ResultsSink(journal_dir)
+    recovered = sink.recover()
+    sink.close()
+    with open(path, newline='') as f:
+        rows = list(csv.reader(f))
+    leftover = os.listdir(journal_dir)
+    return title, rows[0] == HEADER, rows[1:], recovered, leftover
+
+OLD = [['a.jpg', '101A']]
+NEW = [['b.jpg', '202B'], ['c.jpg', '303C']]
+
+cases = [
+    # (result, expected data rows, expected recovered count)
+    (run_case("crash before the flush",
+              OLD, lambda path, size: journal_lines(path, NEW)),
+     OLD + NEW, 2),
+    (run_case("crash mid-flush (torn CSV row)",
+              OLD, lambda path, size: journal_lines(path, NEW, flushed_size=size),
+              csv_tail='b.jpg,202B\r\nc.jp'),
+     OLD + NEW, 2),
+    (run_case("crash after the CSV write, before 'done'",
+              OLD, lambda path, size: journal_lines(path, NEW, flushed_size=size),
+              csv_tail='b.jpg,202B\r\nc.jpg,303C\r\n'),
+     OLD + NEW, 2),
+    (run_case("crash after 'done'",
+              OLD + NEW, lambda path, size: journal_lines(path, NEW, flushed_size=0, done=True)),
+     OLD + NEW, 0),
+    (run_case("torn journal tail (unacknowledged row)",
+              OLD, lambda path, size: journal_lines(path, NEW[:1]),
+              torn_tail='{"path": "x.csv", "header": ["filename"'),
+     OLD + NEW[:1], 1),
+]
+
+passed = failed = 0
+for (title, header_ok, rows, recovered, leftover), expected_rows, expected_recovered in cases:
+    ok = header_ok and rows == expected_rows and recovered == expected_recovered and not leftover
+    if ok:
+        passed += 1
+        print(f"✅ {title}: {len(rows)} rows, {recovered} recovered")
+    else:
+        failed += 1
+        print(f"❌ {title}: rows {rows} (expected {expected_rows}), recovered {recovered} "
+              f"(expected {expected_recovered}), header ok {header_ok}, journals left {leftover}")
+
+print(f"\n{passed} passed, {failed} failed")
+raise SystemExit(1 if failed else 0)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script: a retry tier whose OCR reads the watermark cleanly rescues the photo
+(fake OCR engine, temporary success log with learned correction rules)
+"""
+import os
+import csv
+import tempfile
+
+import cv2
+import numpy as np
+
+import rename_images as ri
+
+WATERMARK = "Wed 14.32 29/10/2025 | Blossom Spring | 462A Yishun Avenue 6, 761462 | water spray"
+
+class FakeReader:
+    """Garbage for the first `garbage_calls` readtext() calls, then the clean watermark"""
+    name = 'fake'
+
+    def __init__(self, garbage_calls):
+        self.garbage_calls = garbage_calls
+        self.calls = 0
+
+    def readtext(self, image, detail=1, **kwargs):
+        self.calls += 1
+        text = "RHE ~~ |:: %%" if self.calls <= self.garbage_calls else WATERMARK
+        h, w = image.shape[:2]
+        boxes = [([[0, 0], [w - 1, 0], [w - 1, h - 1], [0, h - 1]], t, 0.9) for t in text.split(' | ')]
+        return boxes if detail else [b[1] for b in boxes]
+
+tmp = tempfile.mkdtemp()
+ri.LOG_FILE = os.path.join(tmp, 'success_log.csv')
+ri.CORRECTION_RULES_FILE = os.path.join(tmp, 'correction_rules.json')
+ri.OCR_CACHE_FILE = ri.DEDUP_INDEX_FILE = ri.ROI_PROFILE_FILE = None
+ri.MANIFEST_FILE = None
+
+# A known road, plus rows teaching "Yi"/"Yis" → "Yishun" (which used to garble "Yishun" itself)
+with open(ri.LOG_FILE, 'w', newline='') as f:
+    writer = csv.writer(f)
+    writer.writerow(['filename', 'ocr_text', 'block', 'road', 'equipment', 'date'])
+    for i in range(ri.KNOWN_ROAD_MIN_COUNT):
+        writer.writerow([f'{i}.jpg', '462A Yishun Avenue 6', '462A', 'yishun', 'other', '29102025'])
+    writer.writerow(['yi.jpg', '462A Yi Avenue 6', '462A', 'yishun', 'other', '29102025'])
+    writer.writerow(['yis.jpg', '462A Yis Avenue 6', '462A', 'yishun', 'other', '29102025'])
+print(f"Learned rules: {ri.get_correction_index().as_dict()}")
+
+src_path = os.path.join(tmp, 'photo.jpg')
+cv2.imwrite(src_path, np.full((600, 800, 3), 90, dtype=np.uint8))
+
+passed = failed = 0
+# Watermark pass, full pass, then tiers 1..n: the first `garbage_calls - 2` tiers read garbage
+for garbage_calls, expected_tier, expected_retries in [
+    (2, 'retry:' + ri.RETRY_TIERS[0][0], 1),
+    (4, 'retry:' + ri.RETRY_TIERS[2][0], 3),
+    (2 + len(ri.RETRY_TIERS), 'retry-failed', len(ri.RETRY_TIERS)),
+]:
+    ri.ocr_reader = FakeReader(garbage_calls)
+    result = ri.analyze_image(src_path)
+    got = (result.get('tier'), result.get('retries'), result.get('block'))
+    expected = (expected_tier, expected_retries, '462A' if expected_tier != 'retry-failed' else None)
+    if got == expected:
+        passed += 1
+        print(f"✅ {garbage_calls} garbage reads → {got}")
+    else:
+        failed += 1
+        print(f"❌ {garbage_calls} garbage reads → {got}, expected {expected} ({result.get('status')})")
+
+print(f"\n{passed} passed, {failed} failed")
+raise SystemExit(1 if failed else 0)
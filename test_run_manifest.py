@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script: resume_unfinished() finishes each photo an interrupted run left
+in the manifest exactly once (temporary folders, no OCR)
+"""
+import os
+import csv
+import tempfile
+
+import rename_images as ri
+from run_manifest import RunManifest
+
+tmp = tempfile.mkdtemp()
+source_dir, dest_dir = os.path.join(tmp, 'images'), os.path.join(tmp, 'images_renamed')
+for folder in (source_dir, dest_dir):
+    os.makedirs(folder)
+ri.LOG_FILE = os.path.join(tmp, 'success_log.csv')
+ri.ML_TRAINING_DATA = os.path.join(tmp, 'ml_training_data.csv')
+ri.CORRECTION_RULES_FILE = os.path.join(tmp, 'correction_rules.json')
+ri.RESULTS_JOURNAL_DIR = os.path.join(tmp, 'journal')
+
+def photo(name, block):
+    """A source photo plus the analyze_image() result and output path a crashed run recorded for it"""
+    src_path = os.path.join(source_dir, name)
+    with open(src_path, 'wb') as f:
+        f.write(name.encode() * 100)
+    result = {'status': 'success', 'src_path': src_path, 'watermark_ocr': f'{block} Yishun Avenue 6',
+              'block': block, 'road': 'yishun_avenue', 'date': '29102025', 'equipment': 'bp', 'tier': 'full'}
+    dest_path = os.path.join(dest_dir, f"bp_{block}_yishun_avenue_29102025_{name}")
+    st = os.stat(src_path)
+    return result, dest_path, (st.st_size, st.st_mtime_ns)
+
+def csv_rows(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, newline='') as f:
+        return list(csv.reader(f))[1:]
+
+manifest = RunManifest(os.path.join(tmp, 'processed_manifest.sqlite'))
+
+# Died after logging (state 'placing'): its rows are in the CSVs, the photo hasn't moved
+placing, placing_dest, stat = photo('placing.jpg', '462A')
+manifest.begin(placing, 'success', placing_dest, 'logging', stat)
+ri.finish_result(placing, 'success', placing_dest, 'logging', manifest=None)  # Logs, and moves...
+os.replace(placing_dest, placing['src_path'])                                  # ...undo the move
+ri.get_results_sink().flush()
+manifest.set_state(placing['src_path'], 'placing')
+
+# Died after appending its rows but before noting it (state still 'logging')
+logging, logging_dest, stat = photo('logging.jpg', '505D')
+manifest.begin(logging, 'success', logging_dest, 'logging', stat)
+row = (os.path.basename(logging['src_path']), logging['watermark_ocr'], logging['block'],
+       logging['road'], logging['equipment'], logging['date'])
+ri.save_training_pair(*row)
+ri.log_success(*row)
+ri.get_results_sink().flush()
+
+# Died before logging anything
+fresh, fresh_dest, stat = photo('fresh.jpg', '316A')
+manifest.begin(fresh, 'success', fresh_dest, 'logging', stat)
+
+for attempt in range(2):  # The second resume must find nothing left to do
+    ri.resume_unfinished(manifest)
+ri.get_results_sink().flush()
+
+checks = []
+for result, dest_path in ((placing, placing_dest), (logging, logging_dest), (fresh, fresh_dest)):
+    name = os.path.basename(result['src_path'])
+    log_count = sum(1 for row in csv_rows(ri.LOG_FILE) if row[0] == name)
+    training_count = sum(1 for row in csv_rows(ri.ML_TRAINING_DATA) if row[0] == name)
+    checks.append((f"{name}: moved to output", os.path.exists(dest_path) and not os.path.exists(result['src_path'])))
+    checks.append((f"{name}: logged once ({log_count})", log_count == 1))
+    checks.append((f"{name}: one training pair ({training_count})", training_count == 1))
+    checks.append((f"{name}: manifest done", manifest.is_done(result['src_path'])))
+checks.append(("nothing left unfinished", manifest.unfinished() == []))
+
+passed = failed = 0
+for title, ok in checks:
+    print(f"{'✅' if ok else '❌'} {title}")
+    passed, failed = passed + ok, failed + (not ok)
+manifest.close()
+
+print(f"\n{passed} passed, {failed} failed")
+raise SystemExit(1 if failed else 0)
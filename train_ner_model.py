@@ -1,53 +1,270 @@
 # train_ner_model.py — Run this separately after ml_training_data.csv is generated
+#
+# Rows are deduplicated (latest row per filename, then identical text+labels)
+# and split into train/dev by a hash of their content, so a row stays on the
+# same side of the split in every run.
+#
+# Full retrain (default): spans are found once and cached as DocBin files
+# (rebuilt only when the rows or the split change); training then runs spaCy's
+# minibatched loop with the batcher, optimizer, dropout, eval frequency and
+# early-stopping patience from ner_model/config.cfg, keeping the best dev model.
+#
+# --incremental: resume from the installed model and fine-tune only on train
+# rows it hasn't seen (mixed with a replay sample of old rows so it doesn't
+# forget them); the model is only replaced if the dev score doesn't drop.
+# The rows a model has been trained on (or fine-tuned on without improving
+# it, so they aren't retried every run) are listed in <model>/training_state.json.
+#
+# Usage: python train_ner_model.py [--incremental] [--dev-fraction 0.2] [--patience N] [--max-steps N]
 
-import spacy
-from spacy.training import Example
+import os
+import sys
 import csv
+import json
+import random
+import shutil
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+
+import spacy
+from spacy.tokens import DocBin
+
+from rename_images import ML_TRAINING_DATA
+from ner_extractor import NER_MODEL_DIR, installed_model_dir
+
+NER_CORPUS_DIR = "/Users/alfredlim/Redpower/rename_images/ner_corpus"  # cached DocBins
+TRAINING_STATE_FILE = "training_state.json"  # inside the model folder
+
+def row_key(row):
+    """Content hash of one training pair (what the model actually learns from)"""
+    content = '\x1f'.join((row['watermark_ocr'], row['block_label'], row['road_label']))
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+def dedupe_rows(rows):
+    """Latest row per filename, then one row per distinct text+labels; returns {key: row}"""
+    latest = {}
+    for row in rows:
+        latest[row['filename']] = row
+    unique = {}
+    for row in latest.values():
+        unique.setdefault(row_key(row), row)
+    return unique
+
+def is_dev(key, dev_fraction):
+    """Stable split: a row's hash decides its side, whatever else is in the CSV"""
+    return int(key[:8], 16) / 0xFFFFFFFF < dev_fraction
+
+def load_state(model_dir):
+    path = os.path.join(installed_model_dir(model_dir), TRAINING_STATE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_state(model_dir, trained_keys, dev_fraction):
+    path = os.path.join(model_dir, TRAINING_STATE_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'dev_fraction': dev_fraction, 'trained': sorted(trained_keys)}, f)
+    os.replace(path + '.tmp', path)  # The installed model's state may be rewritten in place
+
+def find_entities(text, block, road):
+    """Character spans of the labels in the OCR text (same matching as before: exact find)"""
+    entities = []
+    if block:
+        start = text.find(block)
+        if start != -1:
+            entities.append((start, start + len(block), "BLOCK"))
+    if road:
+        # Clean road for matching
+        road_clean = road.replace('_', ' ')
+        start = text.find(road_clean)
+        if start != -1:
+            entities.append((start, start + len(road_clean), "ROAD"))
+    return entities
+
+def make_doc(nlp, text, entities):
+    """Doc with gold entities; spans that don't line up with tokens are marked unknown, not 'O'"""
+    doc = nlp.make_doc(text)
+    ents, missing = [], []
+    for start, end, label in sorted(entities):
+        span = doc.char_span(start, end, label=label)
+        if span is None:
+            span = doc.char_span(start, end, alignment_mode='expand')
+            target = missing
+        else:
+            target = ents
+        # Overlapping labels can't both be entities: keep the first
+        if span is not None and all(span.end <= s.start or span.start >= s.end for s in ents + missing):
+            target.append(span)
+    doc.set_ents(ents, missing=missing, default="outside")
+    return doc
+
+def load_rows(data_file):
+    with open(data_file, 'r') as f:
+        return list(csv.DictReader(f))
+
+def make_docs(nlp, rows):
+    return [make_doc(nlp, row['watermark_ocr'], find_entities(row['watermark_ocr'], row['block_label'], row['road_label']))
+            for row in rows]
+
+def build_corpus(train_rows, dev_rows, corpus_dir):
+    """Write train.spacy/dev.spacy (or reuse them if built from the same rows)"""
+    spec = {
+        'train': hashlib.sha256(''.join(sorted(train_rows)).encode()).hexdigest(),
+        'dev': hashlib.sha256(''.join(sorted(dev_rows)).encode()).hexdigest(),
+    }
+    spec_path = os.path.join(corpus_dir, 'corpus.json')
+    train_path = os.path.join(corpus_dir, 'train.spacy')
+    dev_path = os.path.join(corpus_dir, 'dev.spacy')
+    if os.path.exists(spec_path) and os.path.exists(train_path) and os.path.exists(dev_path):
+        with open(spec_path, 'r') as f:
+            if json.load(f) == spec:
+                print(f"♻️  Reusing cached training corpus in '{corpus_dir}'")
+                return train_path, dev_path
+
+    nlp = spacy.blank("en")
+    os.makedirs(corpus_dir, exist_ok=True)
+    DocBin(docs=make_docs(nlp, train_rows.values())).to_disk(train_path)
+    DocBin(docs=make_docs(nlp, dev_rows.values())).to_disk(dev_path)
+    with open(spec_path, 'w') as f:
+        json.dump(spec, f)
+    print(f"📦 Cached {len(train_rows)} train / {len(dev_rows)} dev docs in '{corpus_dir}'")
+    return train_path, dev_path
+
+def install_model(trained_dir, model_dir):
+    """
+    Swap the trained pipeline into model_dir: staged next to it, then the old
+    model is renamed to <model_dir>.old and the staged one into place, so
+    loaders never see half a model. Between those two renames (or after a
+    crash there) only the .old one exists, and installed_model_dir(), which
+    every loader goes through, falls back to it.
+    """
+    model_dir = model_dir.rstrip('/')
+    staging = model_dir + '.new'
+    retired = model_dir + '.old'
+    shutil.rmtree(staging, ignore_errors=True)
+    shutil.copytree(trained_dir, staging)
+    if os.path.exists(model_dir):
+        shutil.rmtree(retired, ignore_errors=True)
+        os.replace(model_dir, retired)
+    os.replace(staging, model_dir)
+    shutil.rmtree(retired, ignore_errors=True)
+
+def train_full(config_path, train_rows, dev_rows, corpus_dir, model_dir, dev_fraction, overrides):
+    """Train a fresh model on every train row"""
+    from spacy.training.initialize import init_nlp
+    from spacy.training.loop import train as train_loop
+
+    train_path, dev_path = build_corpus(train_rows, dev_rows, corpus_dir)
+    config = spacy.util.load_config(config_path, overrides={
+        'paths.train': train_path, 'paths.dev': dev_path, **overrides,
+    }, interpolate=False)
+    nlp = init_nlp(config)
+    with tempfile.TemporaryDirectory(prefix='ner_train_') as output_dir:
+        train_loop(nlp, Path(output_dir), stdout=sys.stdout, stderr=sys.stderr)
+        best_dir = os.path.join(output_dir, 'model-best')
+        save_state(best_dir, train_rows, dev_fraction)
+        install_model(best_dir, model_dir)
+
+def train_incremental(train_rows, dev_rows, model_dir, state, replay_ratio, max_epochs, patience, seed):
+    """Fine-tune the installed model on train rows it hasn't seen; returns False if nothing changed"""
+    from spacy.training import Example
+
+    trained = set(state['trained'])
+    new_keys = [key for key in train_rows if key not in trained]
+    if not new_keys:
+        print("✅ No new training pairs since the last training run")
+        return False
+
+    nlp = spacy.load(installed_model_dir(model_dir))
+    rng = random.Random(seed)
+    old_keys = sorted(trained & set(train_rows))
+    replay_keys = rng.sample(old_keys, min(len(old_keys), int(len(new_keys) * replay_ratio)))
+    docs = make_docs(nlp, [train_rows[key] for key in new_keys + replay_keys])
+    examples = [Example(nlp.make_doc(doc.text), doc) for doc in docs]
+    dev_examples = [Example(nlp.make_doc(doc.text), doc) for doc in make_docs(nlp, dev_rows.values())]
+    print(f"🔁 Fine-tuning on {len(new_keys)} new + {len(replay_keys)} replayed pairs "
+          f"({len(dev_examples)} dev)")
+
+    # Same batcher and dropout as a full training run
+    T = spacy.util.registry.resolve({'batcher': nlp.config['training']['batcher']})
+    batcher = T['batcher']
+    dropout = nlp.config['training']['dropout']
+
+    baseline = nlp.evaluate(dev_examples)['ents_f'] or 0.0
+    print(f"   Dev ents_F before: {baseline:.4f}")
+    best_score, best_epoch, best_bytes = baseline, -1, None
+    optimizer = nlp.resume_training()
+    for epoch in range(max_epochs):
+        rng.shuffle(examples)
+        losses = {}
+        for batch in batcher(examples):
+            nlp.update(batch, sgd=optimizer, drop=dropout, losses=losses)
+        score = nlp.evaluate(dev_examples)['ents_f'] or 0.0
+        print(f"   Epoch {epoch}: loss {losses.get('ner', 0):.2f}, dev ents_F {score:.4f}")
+        if score >= best_score:
+            best_score, best_epoch, best_bytes = score, epoch, nlp.to_bytes()
+        elif epoch - best_epoch >= patience:
+            break
+
+    if best_bytes is None:
+        if baseline > 0:
+            print("⚠️ Fine-tuning dropped the dev score; keeping the installed model")
+            # Still record the new pairs, or every later run would retry the same fine-tune
+            save_state(installed_model_dir(model_dir), trained | set(new_keys), state.get('dev_fraction'))
+            return False
+        best_bytes = nlp.to_bytes()
+    nlp.from_bytes(best_bytes)
+    with tempfile.TemporaryDirectory(prefix='ner_train_') as output_dir:
+        nlp.to_disk(output_dir)
+        save_state(output_dir, trained | set(new_keys), state.get('dev_fraction'))
+        install_model(output_dir, model_dir)
+    print(f"   Dev ents_F after: {best_score:.4f}")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the BLOCK/ROAD NER model from ml_training_data.csv")
+    parser.add_argument('--data', default=ML_TRAINING_DATA)
+    parser.add_argument('--model-dir', default=NER_MODEL_DIR, help="Where the trained model is installed")
+    parser.add_argument('--config', help="Training config (default: <model-dir>/config.cfg)")
+    parser.add_argument('--corpus-dir', default=NER_CORPUS_DIR, help="Cache for the preprocessed DocBins")
+    parser.add_argument('--dev-fraction', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--patience', type=int, help="Override training.patience (steps without dev improvement)")
+    parser.add_argument('--max-steps', type=int, help="Override training.max_steps")
+    parser.add_argument('--eval-frequency', type=int, help="Override training.eval_frequency")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Fine-tune the installed model on new pairs only (full retrain if it has no state)")
+    parser.add_argument('--replay-ratio', type=float, default=1.0,
+                        help="--incremental: old pairs mixed in per new pair")
+    parser.add_argument('--epochs', type=int, default=10, help="--incremental: max fine-tuning epochs")
+    parser.add_argument('--epoch-patience', type=int, default=2,
+                        help="--incremental: epochs without dev improvement before stopping")
+    args = parser.parse_args()
+
+    rows = dedupe_rows(load_rows(args.data))
+    state = load_state(args.model_dir) if args.incremental else None
+    # Keep the split the installed model was trained with, so its dev rows stay unseen
+    dev_fraction = state['dev_fraction'] if state and state.get('dev_fraction') is not None else args.dev_fraction
+    train_rows = {key: row for key, row in rows.items() if not is_dev(key, dev_fraction)}
+    dev_rows = {key: row for key, row in rows.items() if is_dev(key, dev_fraction)}
+    print(f"Training pairs: {len(rows)} after dedupe ({len(train_rows)} train / {len(dev_rows)} dev)")
+
+    if args.incremental and state is not None:
+        if train_incremental(train_rows, dev_rows, args.model_dir, state, args.replay_ratio,
+                             args.epochs, args.epoch_patience, args.seed):
+            print(f"✅ Model saved to: {args.model_dir}")
+        raise SystemExit(0)
+    if args.incremental:
+        print(f"⚠️ No {TRAINING_STATE_FILE} in '{args.model_dir}': doing a full retrain")
 
-# Load blank model
-nlp = spacy.blank("en")
-ner = nlp.add_pipe("ner")
-
-# Add labels
-ner.add_label("BLOCK")
-ner.add_label("ROAD")
-
-# Load training data
-TRAIN_DATA = []
-with open("/Users/alfredlim/Redpower/rename_images/ml_training_data.csv", 'r') as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        text = row['watermark_ocr']
-        block = row['block_label']
-        road = row['road_label']
-
-        # Create entity spans
-        entities = []
-        if block:
-            start = text.find(block)
-            if start != -1:
-                entities.append((start, start + len(block), "BLOCK"))
-        if road:
-            # Clean road for matching
-            road_clean = road.replace('_', ' ')
-            start = text.find(road_clean)
-            if start != -1:
-                entities.append((start, start + len(road_clean), "ROAD"))
-
-        # Add to training data
-        TRAIN_DATA.append((text, {"entities": entities}))
-
-# Train model
-nlp.begin_training()
-for i in range(50):  # 50 iterations
-    losses = {}
-    for text, annotations in TRAIN_DATA:
-        doc = nlp.make_doc(text)
-        example = Example.from_dict(doc, annotations)
-        nlp.update([example], losses=losses)
-    if i % 10 == 0:
-        print(f"Epoch {i}, Loss: {losses.get('ner', 0):.3f}")
-
-# Save model
-nlp.to_disk("/Users/alfredlim/Redpower/rename_images/ner_model")
-print("✅ Model saved to: /Users/alfredlim/Redpower/rename_images/ner_model")
\ No newline at end of file
+    config_path = args.config or os.path.join(installed_model_dir(args.model_dir), 'config.cfg')
+    overrides = {}
+    for key, value in (('training.patience', args.patience), ('training.max_steps', args.max_steps),
+                       ('training.eval_frequency', args.eval_frequency)):
+        if value is not None:
+            overrides[key] = value
+    train_full(config_path, train_rows, dev_rows, args.corpus_dir, args.model_dir, dev_fraction, overrides)
+    print(f"✅ Model saved to: {args.model_dir}")
@@ -0,0 +1,74 @@
+# watch_folder.py — yield photos from a folder as soon as they are fully written
+
+import os
+import time
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:  # Not Linux / not installed: fall back to polling
+    INotify = None
+
+def iter_ready_files(folder, extensions, settle_seconds=2.0, poll_interval=1.0):
+    """
+    Forever yield lists of new image paths in `folder`.
+    A file is only yielded once its size and mtime have stayed unchanged for
+    settle_seconds, so half-uploaded photos are never picked up. Each
+    (path, size, mtime) is yielded once; a replaced file is yielded again.
+    Uses inotify when available (wakes up as soon as something lands),
+    otherwise rescans the folder every poll_interval seconds.
+    """
+    inotify = None
+    if INotify is not None:
+        inotify = INotify()
+        inotify.add_watch(folder, flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE)
+        print("👀 Watching with inotify")
+    else:
+        print(f"👀 Watching by polling every {poll_interval:.1f}s")
+
+    pending = {}  # path → (size, mtime, time the signature was first seen)
+    done = {}     # path → (size, mtime) already yielded
+
+    while True:
+        now = time.monotonic()
+        ready = []
+        current = set()
+        for name in os.listdir(folder):
+            if not name.lower().endswith(extensions):
+                continue
+            path = os.path.join(folder, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if not os.path.isfile(path) or st.st_size == 0:
+                continue
+            current.add(path)
+            signature = (st.st_size, st.st_mtime)
+            if done.get(path) == signature:
+                continue
+            if path in pending and pending[path][:2] == signature:
+                if now - pending[path][2] >= settle_seconds:
+                    ready.append(path)
+                    done[path] = signature
+                    del pending[path]
+            else:
+                pending[path] = (*signature, now)
+
+        # Forget files that were moved away (renamed, deleted) so memory stays flat
+        for path in list(done):
+            if path not in current:
+                del done[path]
+        for path in list(pending):
+            if path not in current:
+                del pending[path]
+
+        if ready:
+            yield sorted(ready)
+            continue
+
+        # Nothing ready: wait for a filesystem event, or for pending files to settle
+        timeout = settle_seconds if pending else poll_interval
+        if inotify is not None:
+            inotify.read(timeout=int(timeout * 1000) if pending else None)
+        else:
+            time.sleep(timeout)